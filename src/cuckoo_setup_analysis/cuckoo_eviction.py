@@ -1,4 +1,5 @@
 import random
+import sys
 import time
 import math
 import pandas as pd
@@ -13,9 +14,13 @@ TEST_SPLIT = 0.2
 LOAD_FACTOR = 0.9
 BUCKET_SIZE = 6
 EVICT_LIMITS = [i for i in range(200, 2000, 100)]  # Test different eviction limits
+BENCHMARK_LOAD_FACTORS = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95]  # Loads for the eviction strategy benchmark
+EVICTION_STRATEGIES = ["random", "bfs"]
+MAX_EVICTIONS = 500
 
 # Initialize an empty list to store the results
 results = []
+benchmark_results = []
 
 def experiment_time_insertion(names):
     # Generate a random dataset for insertion and query
@@ -40,7 +45,52 @@ def experiment_time_insertion(names):
             "Duration (seconds)": duration
         })
 
+def experiment_eviction_strategies(names):
+    # Fill filters sized for each load factor with every strategy, timing each insert on its own to catch the worst case
+    data = list(names)
+    for load_factor in BENCHMARK_LOAD_FACTORS:
+        num_buckets = int(len(data) / (load_factor * BUCKET_SIZE))
+        for strategy in EVICTION_STRATEGIES:
+            cuckoo = CuckooFilter(num_buckets=num_buckets, bucket_size=BUCKET_SIZE, fingerprint_size=FINGERPRINT_SIZE,
+                                  max_evictions=MAX_EVICTIONS, hashing="integer", eviction=strategy)
+            failed_inserts = 0
+            worst_insert = 0
+            start = time.time()
+            for name in data:
+                insert_start = time.perf_counter()
+                if not cuckoo.insert(name):
+                    failed_inserts += 1
+                worst_insert = max(worst_insert, time.perf_counter() - insert_start)
+            duration = time.time() - start
+
+            benchmark_results.append({
+                "Load Factor": load_factor,
+                "Eviction Strategy": strategy,
+                "Failed Inserts": failed_inserts,
+                "Duration (seconds)": duration,
+                "Moves per Insert": cuckoo.moves / len(data),
+                "Worst Insert (milliseconds)": worst_insert * 1000
+            })
+
+def plot_eviction_strategies():
+    # Plot every benchmark metric against the load factor, one line per strategy
+    results_df = pd.DataFrame(benchmark_results)
+    metrics = ["Duration (seconds)", "Moves per Insert", "Worst Insert (milliseconds)", "Failed Inserts"]
+    fig, axs = plt.subplots(1, len(metrics), figsize=(24, 6))
+    for ax, metric in zip(axs, metrics):
+        for strategy, color in zip(EVICTION_STRATEGIES, ["blue", "red"]):
+            subset = results_df[results_df["Eviction Strategy"] == strategy]
+            ax.plot(subset["Load Factor"], subset[metric], marker='o', color=color, label=strategy)
+        ax.set_title(f"{metric} vs Load Factor")
+        ax.set_xlabel("Load Factor")
+        ax.set_ylabel(metric)
+        ax.grid(True)
+        ax.legend()
+    plt.tight_layout()
+    plt.show()
+
 # Main script
+# Run with "benchmark" as the first argument to compare the random walk and breadth first eviction strategies
 if __name__ == "__main__":
     # Sample dataset
     main_dataframe = pd.DataFrame()
@@ -54,7 +104,16 @@ if __name__ == "__main__":
     print(f"There are {len(names)} names.")
     names = names.unique()
     print(f"There are {len(names)} unique names.")
-    
+
+    if len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+        experiment_eviction_strategies(names)
+        for result in benchmark_results:
+            for key, value in result.items():
+                print(f"{key}: {value}")
+            print("-" * 50)  # Separator for better readability
+        plot_eviction_strategies()
+        sys.exit(0)
+
     # Run experiment
     experiment_time_insertion(names)
 
@@ -274,7 +274,7 @@ def run_experiment(names, load_factors, sub_size_ratios):
             num_buckets = int(data_size / (load_factor * bucket_size))
 
             # Initialize Cuckoo Filter
-            cuckoo = CuckooFilter(num_buckets=num_buckets, bucket_size=bucket_size, fingerprint_size=fingerprint_size)
+            cuckoo = CuckooFilter(num_buckets=num_buckets, bucket_size=bucket_size, fingerprint_size=fingerprint_size, hashing="bytes")
             bf = BloomFilterSimple(false_positive_rate=false_positive_rate, key_num=int(data_size/load_factor))
             cbf = CountingBloomFilter(false_positive_rate=false_positive_rate, key_num=int(data_size/load_factor))
 
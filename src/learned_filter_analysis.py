@@ -0,0 +1,103 @@
+# Learned bloom filter benchmark
+import glob
+import random
+import time
+
+import matplotlib.pyplot as plt
+import pandas as pd
+from pympler import asizeof
+
+from structures.learned_bloom_filter import LearnedBloomFilter
+from structures.simple_bloom_filter import BloomFilterSimple
+
+FP_RATES = [0.01, 0.005, 0.001, 0.0005, 0.0001]  # same rates as runner.py
+TRAIN_SPLIT = 0.5  # share of the non-keys used to train the classifier
+
+# Initialize an empty list to store the results
+results = []
+
+def query_filter(filter_obj, test):
+    """Queries every item of test one at a time, then as a batch.
+
+    Returns the false positive rate, the mean latency of single queries and the mean latency per item of the batch query.
+    """
+    start = time.time()
+    false_positives = sum(filter_obj.query(item) for item in test)
+    single_duration = time.time() - start
+
+    start = time.time()
+    filter_obj.query_many(test)
+    batch_duration = time.time() - start
+    return false_positives / len(test), single_duration / len(test), batch_duration / len(test)
+
+def experiment_learned_vs_simple(names, articles):
+    # names are the keys, article titles are the non-keys the classifier learns to reject
+    names = set(names)
+    non_keys = [title for title in articles if title not in names]
+    random.shuffle(non_keys)
+    split = int(TRAIN_SPLIT * len(non_keys))
+    train, test = non_keys[:split], non_keys[split:]
+    names = list(names)
+    print(f"Keys: {len(names)}, training non-keys: {len(train)}, test non-keys: {len(test)}")
+
+    for rate in FP_RATES:
+        print(f"Rate {rate}")
+        start = time.time()
+        simple = BloomFilterSimple(false_positive_rate=rate, key_num=len(names))
+        simple.insert_many(names)
+        simple_build = time.time() - start
+
+        start = time.time()
+        learned = LearnedBloomFilter(names, train, false_positive_rate=rate)
+        learned_build = time.time() - start
+
+        for filter_name, filter_obj, build_duration in [("Simple Bloom Filter", simple, simple_build), ("Learned Bloom Filter", learned, learned_build)]:
+            false_positive_rate, single_latency, batch_latency = query_filter(filter_obj, test)
+            results.append({
+                "Filter": filter_name,
+                "Target False Positive Rate": rate,
+                "False Positive Rate": false_positive_rate,
+                "Memory Usage (KB)": asizeof.asizeof(filter_obj) / 1000,
+                "Build Time (seconds)": build_duration,
+                "Query Latency (microseconds)": single_latency * 1e6,
+                "Batch Query Latency (microseconds)": batch_latency * 1e6,
+            })
+
+# Main script
+if __name__ == "__main__":
+    main_dataframe = pd.DataFrame()
+    data_files = glob.glob("data/names/*.txt") # run script from comp480-project/ directory
+    data_list = []
+    for file in data_files:
+        sub_data = pd.read_csv(file, sep=',', names=["Name", "Sex", "Frequency"])
+        data_list.append(sub_data)
+    main_dataframe = pd.concat(data_list, axis=0)
+    names = main_dataframe.iloc[:, 0].unique()
+    print(f"There are {len(names)} unique names.")
+    articles = pd.read_csv("data/medium_articles.csv").iloc[:, 0].dropna().unique()
+    print(f"There are {len(articles)} articles.")
+
+    # Run experiment
+    experiment_learned_vs_simple(names, articles)
+
+    # Print the appended result in a readable format
+    print("Result for current configuration:")
+    for i in range(len(results)):
+        for key, value in results[i].items():
+            print(f"{key}: {value}")
+        print("-" * 50)  # Separator for better readability
+
+    # Convert results into a DataFrame for easier analysis
+    results_df = pd.DataFrame(results)
+
+    for metric, suffix in [("Memory Usage (KB)", "mem"), ("Query Latency (microseconds)", "time")]:
+        for filter_name, color in [("Simple Bloom Filter", "blue"), ("Learned Bloom Filter", "orange")]:
+            subset = results_df[results_df["Filter"] == filter_name]
+            plt.plot(subset["Target False Positive Rate"], subset[metric], marker='o', color=color, label=filter_name)
+        plt.xscale("log")
+        plt.title(f"Learned vs Simple Bloom Filter {metric.split(' (')[0]}")
+        plt.xlabel("Target False Positive Rate")
+        plt.ylabel(metric)
+        plt.legend()
+        plt.savefig(f"plots/learned_bloom-{suffix}.png")
+        plt.clf()
@@ -9,22 +9,26 @@ import time
 from pympler import asizeof
 
 from structures.simple_bloom_filter import BloomFilterSimple
+from structures.blocked_bloom_filter import BlockedBloomFilter
 from structures.counting_bloom_filter import CountingBloomFilter
 from structures.cuckoo_filter import CuckooFilter
 from structures.consistent_hashing import ConsistentHashing
+from structures.hyperloglog import HyperLogLog
 from storage_system import System
 
 # Read data
 main_dataframe = pd.DataFrame()
 data_files = glob.glob("data/names/*.txt")
 data_list = []
+distinct_names = HyperLogLog()
 for file in data_files:
 	sub_data = pd.read_csv(file, sep=',', names=["Name", "Sex", "Frequency"])
+	distinct_names.add_many(sub_data["Name"].to_numpy())
 	data_list.append(sub_data)
 main_dataframe = pd.concat(data_list, axis=0)
 names = main_dataframe.iloc[:, 0]
 names = names.unique()
-print(f"There are {len(names)} unique names.")
+print(f"There are {len(names)} unique names (HyperLogLog estimate: {round(distinct_names.count())}).")
 
 main_dataframe = pd.read_csv("data/medium_articles.csv")
 articles = main_dataframe.iloc[:, 0].unique()
@@ -98,6 +102,7 @@ def benchmark_insertion():
 	trees = ["", "bst", "rbt"]
 	lookup_table = {
 		"simple_bloom": "Simple Bloom Filter",
+		"blocked_bloom": "Blocked Bloom Filter",
 		"counting_bloom": "Counting Bloom Filter",
 		"cuckoo_filter": "Cuckoo Filter",
 		"simple": "Naive Ring",
@@ -116,11 +121,15 @@ def benchmark_insertion():
 			end = time.time()
 			overheads[f"simple_bloom({rate})-{'simple' if tree=='' else tree}_ch"] = end - start
 			start = time.time()
+			systems[f"blocked_bloom({rate})-{'simple' if tree=='' else tree}_ch"] = System(BlockedBloomFilter(false_positive_rate=rate, key_num=103600), ConsistentHashing(ring_size=1000000, num_servers=10000, tree=tree))
+			end = time.time()
+			overheads[f"blocked_bloom({rate})-{'simple' if tree=='' else tree}_ch"] = end - start
+			start = time.time()
 			systems[f"counting_bloom({rate})-{'simple' if tree=='' else tree}_ch"] = System(CountingBloomFilter(false_positive_rate=rate, key_num=103600), ConsistentHashing(ring_size=1000000, num_servers=10000, tree=tree))
 			end = time.time()
 			overheads[f"counting_bloom({rate})-{'simple' if tree=='' else tree}_ch"] = end - start
 			start = time.time()
-			systems[f"cuckoo_filter({rate})-{'simple' if tree=='' else tree}_ch"] = System(CuckooFilter(bucket_size=6, num_buckets=20370, fingerprint_size=6, max_evictions=500), ConsistentHashing(ring_size=1000000, num_servers=10000, tree=tree))
+			systems[f"cuckoo_filter({rate})-{'simple' if tree=='' else tree}_ch"] = System(CuckooFilter(bucket_size=6, num_buckets=20370, fingerprint_size=6, max_evictions=500, hashing="integer", elastic=True), ConsistentHashing(ring_size=1000000, num_servers=10000, tree=tree))
 			end = time.time()
 			overheads[f"cuckoo_filter({rate})-{'simple' if tree=='' else tree}_ch"] = end - start
 
@@ -3,11 +3,14 @@ import sys
 
 class System:
 
-    def __init__(self, username_storage, data_storage):
+    def __init__(self, username_storage, data_storage, user_counter=None):
         self.__users = username_storage
         self.__data = data_storage
+        self.__user_counter = user_counter # optional HyperLogLog counting distinct users
     
     def add_user(self, name)->bool:
+        if self.__user_counter is not None:
+            self.__user_counter.add(name)
         success = self.__users.insert(name)
         if not success: # TODO split for logging messages later
             return False
@@ -19,6 +22,11 @@ class System:
             return False
         return True
     
+    def count_users(self)->float:
+        if self.__user_counter is None:
+            raise Exception("System has no user counter.")
+        return self.__user_counter.count()
+
     def get_item(self, item)->bool:
         success = self.__data.query(item) == 1
         if not success: # TODO split for logging messages later
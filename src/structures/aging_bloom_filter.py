@@ -0,0 +1,131 @@
+import logging
+import math
+import numpy as np
+import time
+
+from bitarray import bitarray
+from structures.bit_array import get_bits, insert_rows
+from structures.hashing import BloomHashes
+
+# Set up logging
+logger = logging.getLogger()
+logger.setLevel(logging.DEBUG)
+
+class AgingBloomFilter:
+    """
+    AgingBloomFilter implements a sliding-window bloom filter for streams, using a ring of generations of equally sized bitarrays.
+    Items are inserted into the current generation and a query checks every generation, so an item is remembered for
+    between generations - 1 and generations rotations. Rotating with advance() clears the oldest generation and makes it current,
+    which keeps memory and query cost constant on an unbounded stream.
+    With a generation_interval (in seconds), rotation happens automatically based on the clock.
+    Each generation holds key_num keys at false_positive_rate / generations, so the whole window stays within false_positive_rate.
+    """
+
+    def __init__(self, false_positive_rate=0.01, key_num=1e6, generations=2, generation_interval=None, hash_mode="seeded", clock=time.monotonic):
+        '''Initialize an aging bloom filter of a number of generations, each expecting key_num keys.'''
+        if generations < 2:
+            raise Exception("An aging bloom filter needs at least two generations.")
+        self.__false_positive_rate = false_positive_rate
+        self.__key_num = key_num
+        self.__generation_interval = generation_interval
+        self.__hash_mode = hash_mode
+        self.__clock = clock
+        self.__generate_bit_arrays(generations)
+        self.__generate_hash_functions()
+        self.__current = 0
+        self.__generation_start = clock()
+        logger.info("Initialized an aging bloom filter...")
+
+    def __generate_bit_arrays(self, generations):
+        '''Generates one bit array per generation during initialization.'''
+        generation_rate = self.__false_positive_rate / generations
+        num_bits = math.ceil(self.__key_num * np.log(generation_rate) / np.log(0.618))
+        self.__bit_arrays = [bitarray(num_bits, endian="big") for _ in range(generations)]
+        logger.debug("Generated %d arrays of size %d", generations, num_bits)
+
+    def __generate_hash_functions(self):
+        '''Generates the hash functions shared by all generations.'''
+        num_bits = len(self.__bit_arrays[0])
+        num_hashes = math.floor(num_bits / self.__key_num * np.log(2))
+        self.__hash_functions = BloomHashes(num_hashes, num_bits, self.__hash_mode)
+        logger.debug("Generated and stored %d hash functions", len(self.__hash_functions))
+
+    def __rotate_if_due(self):
+        '''Advances once for every generation interval that has passed since the current generation started.'''
+        if self.__generation_interval is None:
+            return
+        elapsed = self.__clock() - self.__generation_start
+        steps = int(elapsed // self.__generation_interval)
+        for _ in range(min(steps, len(self.__bit_arrays))):
+            self.advance()
+        self.__generation_start += steps * self.__generation_interval
+
+    def advance(self):
+        """Rotates the generations: the oldest generation is cleared and becomes the current one."""
+        self.__current = (self.__current + 1) % len(self.__bit_arrays)
+        self.__bit_arrays[self.__current].setall(0)
+        logger.debug("Advanced to generation %d", self.__current)
+
+    def get_num_generations(self):
+        return len(self.__bit_arrays)
+
+    def insert(self, item)->bool:
+        """Inserts a given item into the current generation. Items seen in older generations are refreshed.
+
+        Returns a boolean representing whether the item is new to the window.
+        """
+        self.__rotate_if_due()
+        indices = list(self.__hash_functions.indices(item))
+        available = not self.__contains(indices)
+        current = self.__bit_arrays[self.__current]
+        for hashed_key in indices:
+            current[hashed_key] = 1
+        logger.debug("Inserted item")
+        return available
+
+    def __contains(self, indices)->bool:
+        '''Checks whether any generation has all of the given bits set.'''
+        return any(all(bit_array[hashed_key] for hashed_key in indices) for bit_array in self.__bit_arrays)
+
+    def query(self, item)->int:
+        """Checks every generation for a given item's existence.
+
+        Returns 1 if the item was seen within the window, 0 otherwise.
+        """
+        self.__rotate_if_due()
+        if self.__contains(list(self.__hash_functions.indices(item))):
+            logger.debug("Item is found")
+            return 1
+        logger.debug("Item is not found")
+        return 0
+
+    def insert_many(self, items)->np.ndarray:
+        """Inserts a batch of items into the current generation in bulk.
+
+        Returns a numpy boolean array that is True where the item was new to the window.
+        """
+        self.__rotate_if_due()
+        if not isinstance(items, np.ndarray):
+            items = list(items)
+        indices = self.__hash_functions.index_matrix(items)
+        seen = np.zeros(len(items), dtype=bool)
+        for position, bit_array in enumerate(self.__bit_arrays):
+            if position != self.__current:
+                seen |= get_bits(bit_array, indices).all(axis=1)
+        available, _ = insert_rows(self.__bit_arrays[self.__current], indices)
+        logger.debug("Inserted %d items", len(items))
+        return available & ~seen
+
+    def query_many(self, items)->np.ndarray:
+        """Checks every generation for the existence of every item in a batch.
+
+        Returns a numpy boolean array that is True where the item was seen within the window.
+        """
+        self.__rotate_if_due()
+        if not isinstance(items, np.ndarray):
+            items = list(items)
+        indices = self.__hash_functions.index_matrix(items)
+        found = np.zeros(len(items), dtype=bool)
+        for bit_array in self.__bit_arrays:
+            found |= get_bits(bit_array, indices).all(axis=1)
+        return found
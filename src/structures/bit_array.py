@@ -0,0 +1,41 @@
+import numpy as np
+
+def bit_view(bit_array)->np.ndarray:
+    """Exposes the buffer of a big-endian bitarray as a numpy array of bytes without copying.
+
+    Returns the numpy uint8 view.
+    """
+    return np.frombuffer(bit_array, dtype=np.uint8)
+
+def get_bits(bit_array, indices: np.ndarray)->np.ndarray:
+    """Reads the bits at the given indices of a big-endian bitarray.
+
+    Returns a numpy boolean array shaped like indices.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    return ((bit_view(bit_array)[indices >> 3] >> (7 - (indices & 7))) & 1).astype(bool)
+
+def set_bits(bit_array, indices: np.ndarray):
+    """Sets the bits at the given indices of a big-endian bitarray to 1."""
+    indices = np.asarray(indices, dtype=np.int64).ravel()
+    masks = np.left_shift(1, 7 - (indices & 7)).astype(np.uint8)
+    np.bitwise_or.at(bit_view(bit_array), indices >> 3, masks)
+
+def insert_rows(bit_array, indices: np.ndarray)->np.ndarray:
+    """Sets every bit of an (items, k) index matrix, one row per inserted item.
+    An item counts as newly inserted if at least one of its bits was still 0 when its turn came,
+    i.e. the result matches inserting the rows one at a time in order.
+
+    Returns a numpy boolean array with one entry per row, and the number of bits flipped from 0 to 1.
+    """
+    num_items, num_hashes = indices.shape
+    if num_items == 0 or num_hashes == 0:
+        return np.zeros(num_items, dtype=bool), 0
+    was_unset = ~get_bits(bit_array, indices)
+    # the first row of the batch hashing to a slot is the one that flips it
+    _, first_positions, inverse = np.unique(indices.ravel(), return_index=True, return_inverse=True)
+    flipped_by = (first_positions // num_hashes)[inverse.ravel()].reshape(num_items, num_hashes)
+    available = (was_unset & (flipped_by == np.arange(num_items)[:, None])).any(axis=1)
+    newly_set = int(np.count_nonzero(was_unset.ravel()[first_positions]))
+    set_bits(bit_array, indices)
+    return available, newly_set
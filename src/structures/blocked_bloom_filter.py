@@ -0,0 +1,133 @@
+import logging
+import math
+import numpy as np
+
+from bitarray import bitarray
+from structures.bit_array import get_bits, insert_rows
+from structures.hashing import digest64, digest64_batch, mix64, mix64_batch
+
+# Set up logging
+logger = logging.getLogger()
+logger.setLevel(logging.DEBUG)
+
+# One 64 byte cache line per block
+BLOCK_BITS = 512
+POSITION_BITS = 9  # bits of a position inside a block
+POSITIONS_PER_WORD = 64 // POSITION_BITS  # positions sliced from each mixed 64 bit word
+
+def blocked_false_positive_rate(num_bits: int, key_num, num_hashes: int, block_bits=BLOCK_BITS)->float:
+    """Computes the false positive rate of a blocked bloom filter.
+    The keys of a block follow a Poisson distribution with mean key_num / num_blocks, and a block
+    holding c keys answers a false positive with probability (1 - (1 - 1/block_bits)^(c*k))^k.
+
+    Returns the expected false positive rate.
+    """
+    num_blocks = num_bits // block_bits
+    mean = key_num / num_blocks
+    counts = np.arange(0, math.ceil(mean + 10 * math.sqrt(mean) + 10))
+    log_poisson = counts * math.log(mean) - mean - np.array([math.lgamma(c + 1) for c in counts])
+    block_rates = (1 - (1 - 1 / block_bits) ** (counts * num_hashes)) ** num_hashes
+    return float(np.sum(np.exp(log_poisson) * block_rates))
+
+class BlockedBloomFilter:
+    """
+    BlockedBloomFilter implements a cache-line blocked bloom filter using a bitarray split into 512 bit blocks.
+    Each key is hashed to a single block and all k of its bits are placed inside that block,
+    so every insert or query touches one small contiguous region of the bit array.
+    Blocking raises the false positive rate slightly, so the bit array is grown until the blocked rate meets the target.
+    """
+
+    def __init__(self, false_positive_rate=0.01, key_num=1e6):
+        '''Initialize a blocked bloom filter, with false positive rate set to 0.01 and expected number of keys set to 1 million.'''
+        self.__false_positive_rate = false_positive_rate
+        self.__key_num = key_num
+        self.__generate_bit_array()
+        logger.info("Initialized a blocked bloom filter...")
+
+    def __generate_bit_array(self):
+        '''Generates the bit array for the blocked bloom filter during initialization.'''
+        # start from the size and hash count of an unblocked filter, then add blocks until blocking meets the target rate
+        num_bits = math.ceil(self.__key_num * np.log(self.__false_positive_rate) / np.log(0.618))
+        self.__num_hashes = max(1, math.floor(num_bits / self.__key_num * np.log(2)))
+        num_blocks = max(1, math.ceil(num_bits / BLOCK_BITS))
+        while blocked_false_positive_rate(num_blocks * BLOCK_BITS, self.__key_num, self.__num_hashes) > self.__false_positive_rate:
+            num_blocks = math.ceil(num_blocks * 1.02)
+        self.__num_blocks = num_blocks
+        self.__bit_array = bitarray(num_blocks * BLOCK_BITS, endian="big")
+        logger.debug("Generated %d blocks of %d bits with %d hashes", self.__num_blocks, BLOCK_BITS, self.__num_hashes)
+
+    def __indices(self, item)->list:
+        '''Hashes an item to its block and to k bits inside that block.'''
+        digest = digest64(item)
+        offset = ((digest >> 32) % self.__num_blocks) * BLOCK_BITS
+        # every position is its own 9 bit slice of a mix of the digest, so the k bits are independent of each other
+        indices = []
+        for i in range(self.__num_hashes):
+            if i % POSITIONS_PER_WORD == 0:
+                word = mix64(digest, i // POSITIONS_PER_WORD + 1)
+            indices.append(offset + ((word >> (POSITION_BITS * (i % POSITIONS_PER_WORD))) & (BLOCK_BITS - 1)))
+        return indices
+
+    def __index_matrix(self, items)->np.ndarray:
+        '''Computes the hashed slots of every item in a batch in one pass.'''
+        digests = digest64_batch(items)
+        offsets = (digests >> np.uint64(32)) % np.uint64(self.__num_blocks) * np.uint64(BLOCK_BITS)
+        rounds = np.arange(self.__num_hashes)
+        words = np.stack([mix64_batch(digests, seed + 1) for seed in range(math.ceil(self.__num_hashes / POSITIONS_PER_WORD))], axis=1)
+        shifts = (POSITION_BITS * (rounds % POSITIONS_PER_WORD)).astype(np.uint64)
+        positions = (words[:, rounds // POSITIONS_PER_WORD] >> shifts[None, :]) & np.uint64(BLOCK_BITS - 1)
+        return (offsets[:, None] + positions).astype(np.int64)
+
+    def get_num_blocks(self):
+        return self.__num_blocks
+
+    def get_num_hashes(self):
+        return self.__num_hashes
+
+    def insert(self, item)->bool:
+        """Inserts a given item to the blocked bloom filter by flipping its hashed slots inside its block to 1.
+
+        Returns a boolean representing successful insertion.
+        An insertion is unsuccessful if the bloom filter thinks that this item has already been inserted.
+        """
+        available = False
+        for hashed_key in self.__indices(item):
+            if self.__bit_array[hashed_key] == 0:
+                available = True
+            self.__bit_array[hashed_key] = 1
+        logger.debug("Inserted item")
+        return available
+
+    def query(self, item)->int:
+        """Checks the blocked bloom filter for a given item's existence.
+
+        Returns 1 if exists, 0 otherwise.
+        """
+        for hashed_key in self.__indices(item):
+            if self.__bit_array[hashed_key] == 0:
+                logger.debug("Item is not found")
+                return 0
+        logger.debug("Item is found")
+        return 1
+
+    def insert_many(self, items)->np.ndarray:
+        """Inserts a batch of items to the blocked bloom filter in bulk.
+
+        Returns a numpy boolean array holding, for each item, what insert would have returned had the items been inserted one at a time.
+        """
+        if not isinstance(items, np.ndarray):
+            items = list(items)
+        available, _ = insert_rows(self.__bit_array, self.__index_matrix(items))
+        logger.debug("Inserted %d items", len(available))
+        return available
+
+    def query_many(self, items)->np.ndarray:
+        """Checks the blocked bloom filter for the existence of every item in a batch.
+
+        Returns a numpy boolean array that is True where the item may exist.
+        """
+        if not isinstance(items, np.ndarray):
+            items = list(items)
+        indices = self.__index_matrix(items)
+        logger.debug("Queried %d items", len(indices))
+        return get_bits(self.__bit_array, indices).all(axis=1)
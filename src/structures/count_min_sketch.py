@@ -0,0 +1,111 @@
+import logging
+import math
+import numpy as np
+
+from structures.counter_array import CounterArray
+from structures.hashing import BloomHashes
+
+# Set up logging
+logger = logging.getLogger()
+logger.setLevel(logging.DEBUG)
+
+class CountMinSketch:
+    """
+    CountMinSketch implements a count-min sketch: depth rows of width counters, with one hash function per row.
+    Adding an item adds its count to one counter in every row, and the estimated frequency of an item is the
+    smallest of its counters, which never underestimates and overestimates by at most epsilon times the total count
+    with probability 1 - delta.
+    The rows are stored back to back in one CounterArray and hashed with the same BloomHashes as the counting bloom filter.
+    With conservative update, a counter is only raised as far as the item's new estimate needs, which cuts the overestimate
+    for skewed streams but makes the sketch insert-only.
+    """
+
+    def __init__(self, epsilon=0.001, delta=0.01, conservative=False, hash_mode="seeded", counter_bits=64):
+        '''Initialize a count-min sketch with error bound epsilon and failure probability delta, set to 0.001 and 0.01.'''
+        self.__epsilon = epsilon
+        self.__delta = delta
+        self.__conservative = conservative
+        self.__width = math.ceil(math.e / epsilon)
+        self.__depth = math.ceil(math.log(1 / delta))
+        self.__total = 0
+        self.__counter_array = CounterArray(self.__width * self.__depth, counter_bits)
+        self.__hash_functions = BloomHashes(self.__depth, self.__width, hash_mode)
+        self.__row_offsets = np.arange(self.__depth, dtype=np.int64) * self.__width
+        logger.info("Initialized a count-min sketch of %d rows of %d counters", self.__depth, self.__width)
+
+    def get_width(self):
+        return self.__width
+
+    def get_depth(self):
+        return self.__depth
+
+    def get_total(self):
+        return self.__total
+
+    def get_conservative(self):
+        return self.__conservative
+
+    def get_saturation_count(self):
+        return self.__counter_array.get_saturation_count()
+
+    def __indices(self, item)->np.ndarray:
+        '''Gets the counter index of an item in every row.'''
+        return np.fromiter(self.__hash_functions.indices(item), dtype=np.int64, count=self.__depth) + self.__row_offsets
+
+    def __index_matrix(self, items)->np.ndarray:
+        '''Gets the counter indices of every item of a batch, one row of the matrix per item.'''
+        if not isinstance(items, np.ndarray):
+            items = list(items)
+        return self.__hash_functions.index_matrix(items) + self.__row_offsets[None, :]
+
+    def add(self, item, count=1)->int:
+        """Adds count occurrences of an item to the sketch.
+
+        Returns the estimated frequency of the item after the addition.
+        """
+        if count < 0:
+            raise Exception("Count is invalid.")
+        indices = self.__indices(item)
+        if self.__conservative:
+            estimate = int(self.__counter_array.get_many(indices).min()) + count
+            self.__counter_array.raise_many(indices, np.full(self.__depth, estimate))
+        else:
+            self.__counter_array.add_many(indices, np.full(self.__depth, count))
+        self.__total += count
+        logger.debug("Added item")
+        return int(self.__counter_array.get_many(indices).min())
+
+    def add_many(self, items, counts=None):
+        """Adds a batch of items to the sketch in bulk, each once or counts[i] times.
+        With conservative update every item is raised from its estimate before the batch, so the result never underestimates
+        but may sit slightly above what adding the items one at a time would give.
+        """
+        indices = self.__index_matrix(items)
+        counts = np.ones(len(indices), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        if (counts < 0).any():
+            raise Exception("Count is invalid.")
+        if self.__conservative:
+            # repeated items share all their counters, so they are raised once with their summed count
+            unique_indices, inverse = np.unique(indices, axis=0, return_inverse=True)
+            summed = np.zeros(len(unique_indices), dtype=np.int64)
+            np.add.at(summed, inverse.ravel(), counts)
+            estimates = self.__counter_array.get_many(unique_indices).min(axis=1) + summed
+            self.__counter_array.raise_many(unique_indices, np.repeat(estimates, self.__depth))
+        else:
+            self.__counter_array.add_many(indices, np.repeat(counts, self.__depth))
+        self.__total += int(counts.sum())
+        logger.debug("Added %d items", len(indices))
+
+    def estimate(self, item)->int:
+        """Estimates the frequency of an item.
+
+        Returns the smallest counter of the item, an upper bound of its true frequency.
+        """
+        return int(self.__counter_array.get_many(self.__indices(item)).min())
+
+    def estimate_many(self, items)->np.ndarray:
+        """Estimates the frequency of every item of a batch.
+
+        Returns a numpy integer array of upper bounds, one per item.
+        """
+        return self.__counter_array.get_many(self.__index_matrix(items)).min(axis=1)
@@ -0,0 +1,244 @@
+import math
+import numpy as np
+
+COUNTER_WIDTHS = (4, 8, 64)
+SPARSE_ENTRY_BYTES = 100  # rough cost of one dict entry with its int key and value
+
+class CounterArray:
+    """
+    CounterArray implements an array of saturating counters of 4, 8 or 64 bits each.
+    4 bit counters are packed two to a byte (the even counter in the low nibble), 8 bit counters take one byte each,
+    and 64 bit counters are plain numpy integers.
+    A counter that reaches its maximum value saturates instead of wrapping: further increments are dropped and counted,
+    and it is never decremented again, since its true count is no longer known.
+    A sparse counter array starts as a dict of its non-zero counters and switches to the dense storage for good
+    once it holds more than density_threshold of its counters, or, by default, once the dict would outgrow the dense storage.
+    """
+
+    def __init__(self, num_counters: int, counter_bits=64, sparse=False, density_threshold=None):
+        '''Initialize num_counters counters of counter_bits bits each, all set to 0.'''
+        if counter_bits not in COUNTER_WIDTHS:
+            raise Exception("Counter width is invalid.")
+        self.__num_counters = num_counters
+        self.__counter_bits = counter_bits
+        self.__saturation_count = 0
+        self.__max_value = np.iinfo(np.int64).max if counter_bits == 64 else (1 << counter_bits) - 1
+        self.__sparse = sparse
+        if sparse:
+            dense_bytes = math.ceil(num_counters * counter_bits / 8)
+            self.__sparse_limit = dense_bytes // SPARSE_ENTRY_BYTES if density_threshold is None else int(density_threshold * num_counters)
+            self.__storage = {}
+        else:
+            self.__storage = self.__dense_storage()
+
+    def __dense_storage(self):
+        '''Allocates the dense storage of the counters, all set to 0.'''
+        if self.__counter_bits == 64:
+            return np.zeros(self.__num_counters, dtype=np.int64)
+        # a bytearray is fastest for single counters, and a numpy view over it serves whole-array operations
+        return bytearray(math.ceil(self.__num_counters * self.__counter_bits / 8))
+
+    def __densify_if_full(self):
+        '''Moves a sparse counter array that went past its limit to the dense storage.'''
+        if not self.__sparse or len(self.__storage) <= self.__sparse_limit:
+            return
+        entries = self.__storage
+        self.__sparse = False
+        self.__storage = self.__dense_storage()
+        self.__set_many(np.fromiter(entries.keys(), dtype=np.int64, count=len(entries)), np.fromiter(entries.values(), dtype=np.int64, count=len(entries)))
+
+    def __len__(self):
+        return self.__num_counters
+
+    def get_counter_bits(self):
+        return self.__counter_bits
+
+    def get_max_value(self):
+        return self.__max_value
+
+    def get_saturation_count(self):
+        return self.__saturation_count
+
+    def is_sparse(self)->bool:
+        return self.__sparse
+
+    def nbytes(self)->int:
+        """Gets the number of bytes holding the counters, estimated from the number of entries while sparse."""
+        if self.__sparse:
+            return len(self.__storage) * SPARSE_ENTRY_BYTES
+        return len(self.__storage) if self.__counter_bits != 64 else self.__storage.nbytes
+
+    def get(self, index: int)->int:
+        """Gets the value of a counter."""
+        if self.__sparse:
+            return self.__storage.get(int(index), 0)
+        if self.__counter_bits == 4:
+            return (self.__storage[index >> 1] >> ((index & 1) << 2)) & 0xF
+        return int(self.__storage[index])
+
+    def __set(self, index: int, value: int):
+        '''Sets a counter to a value that fits its width.'''
+        if self.__sparse:
+            if value:
+                self.__storage[int(index)] = value
+                self.__densify_if_full()
+            else:
+                self.__storage.pop(int(index), None)
+        elif self.__counter_bits == 4:
+            shift = (index & 1) << 2
+            self.__storage[index >> 1] = (self.__storage[index >> 1] & ~(0xF << shift) & 0xFF) | (value << shift)
+        else:
+            self.__storage[index] = value
+
+    def increment(self, index: int)->int:
+        """Adds 1 to a counter unless it is saturated, in which case the increment is counted as lost.
+
+        Returns the value of the counter before the increment.
+        """
+        value = self.get(index)
+        if value >= self.__max_value:
+            self.__saturation_count += 1
+        else:
+            self.__set(index, value + 1)
+        return value
+
+    def decrement(self, index: int)->int:
+        """Subtracts 1 from a counter unless it is 0 or saturated.
+
+        Returns the value of the counter before the decrement.
+        """
+        value = self.get(index)
+        if 0 < value < self.__max_value:
+            self.__set(index, value - 1)
+        return value
+
+    def get_many(self, indices: np.ndarray)->np.ndarray:
+        """Gets the values of the counters at an array of indices.
+
+        Returns a numpy int64 array shaped like indices.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if self.__sparse:
+            return np.fromiter((self.__storage.get(index, 0) for index in indices.ravel().tolist()), dtype=np.int64, count=indices.size).reshape(indices.shape)
+        if self.__counter_bits == 64:
+            return self.__storage[indices]
+        packed = np.frombuffer(self.__storage, dtype=np.uint8)
+        if self.__counter_bits == 8:
+            return packed[indices].astype(np.int64)
+        return ((packed[indices >> 1] >> ((indices & 1) << 2)) & 0xF).astype(np.int64)
+
+    def __set_many(self, indices: np.ndarray, values: np.ndarray):
+        '''Sets the counters at an array of distinct indices to values that fit their width.'''
+        if self.__sparse:
+            for index, value in zip(indices.tolist(), values.tolist()):
+                if value:
+                    self.__storage[index] = value
+                else:
+                    self.__storage.pop(index, None)
+            self.__densify_if_full()
+            return
+        if self.__counter_bits == 64:
+            self.__storage[indices] = values
+            return
+        packed = np.frombuffer(self.__storage, dtype=np.uint8)
+        if self.__counter_bits == 8:
+            packed[indices] = values
+            return
+        # even and odd counters are written separately so that no byte is written twice in one assignment
+        for parity in (0, 1):
+            selected = (indices & 1) == parity
+            byte_indices = indices[selected] >> 1
+            keep_mask = 0xF0 if parity == 0 else 0x0F
+            packed[byte_indices] = (packed[byte_indices] & keep_mask) | (values[selected].astype(np.uint8) << (4 * parity))
+
+    def set_many(self, indices: np.ndarray, values: np.ndarray):
+        """Overwrites the counters at an array of distinct indices, saturating the values that do not fit and counting the increments lost."""
+        indices = np.asarray(indices, dtype=np.int64).ravel()
+        values = np.asarray(values, dtype=np.int64).ravel()
+        overflow = values - self.__max_value
+        self.__saturation_count += int(overflow[overflow > 0].sum())
+        self.__set_many(indices, np.clip(values, 0, self.__max_value))
+
+    def add_many(self, indices: np.ndarray, weights=None)->int:
+        """Adds 1, or the matching weight, to the counter at every index, once per occurrence, saturating like increment.
+
+        Returns the number of counters that went from 0 to non-zero.
+        """
+        indices = np.asarray(indices, dtype=np.int64).ravel()
+        unique_indices, inverse = np.unique(indices, return_inverse=True)
+        amounts = np.zeros(len(unique_indices), dtype=np.int64)
+        np.add.at(amounts, inverse, 1 if weights is None else np.asarray(weights, dtype=np.int64).ravel())
+        old = self.get_many(unique_indices)
+        wanted = old + amounts
+        self.__saturation_count += int(np.maximum(wanted - self.__max_value, 0).sum())
+        self.__set_many(unique_indices, np.minimum(wanted, self.__max_value))
+        return int(np.count_nonzero((old == 0) & (wanted > 0)))
+
+    def raise_many(self, indices: np.ndarray, values: np.ndarray)->int:
+        """Raises the counter at every index to at least the matching value, saturating values that do not fit.
+        An index given several times is raised to the largest of its values.
+
+        Returns the number of counters that went from 0 to non-zero.
+        """
+        indices = np.asarray(indices, dtype=np.int64).ravel()
+        values = np.asarray(values, dtype=np.int64).ravel()
+        unique_indices, inverse = np.unique(indices, return_inverse=True)
+        wanted = np.zeros(len(unique_indices), dtype=np.int64)
+        np.maximum.at(wanted, inverse, values)
+        old = self.get_many(unique_indices)
+        wanted = np.maximum(old, wanted)
+        self.__saturation_count += int(np.maximum(wanted - self.__max_value, 0).sum())
+        self.__set_many(unique_indices, np.minimum(wanted, self.__max_value))
+        return int(np.count_nonzero((old == 0) & (wanted > 0)))
+
+    def subtract_many(self, indices: np.ndarray)->int:
+        """Subtracts 1 from the counter at every index, once per occurrence, stopping at 0 and skipping saturated counters like decrement.
+
+        Returns the number of counters that went from non-zero to 0.
+        """
+        unique_indices, occurrences = np.unique(np.asarray(indices, dtype=np.int64).ravel(), return_counts=True)
+        old = self.get_many(unique_indices)
+        new = np.where(old >= self.__max_value, old, np.maximum(old - occurrences, 0))
+        self.__set_many(unique_indices, new)
+        return int(np.count_nonzero((old > 0) & (new == 0)))
+
+    def values(self)->np.ndarray:
+        """Gets the values of all counters.
+
+        Returns a new numpy int64 array.
+        """
+        if self.__sparse:
+            values = np.zeros(self.__num_counters, dtype=np.int64)
+            values[list(self.__storage.keys())] = list(self.__storage.values())
+            return values
+        if self.__counter_bits == 64:
+            return self.__storage.copy()
+        packed = np.frombuffer(self.__storage, dtype=np.uint8)
+        if self.__counter_bits == 8:
+            return packed.astype(np.int64)
+        nibbles = np.empty(len(packed) * 2, dtype=np.int64)
+        nibbles[0::2] = packed & 0xF
+        nibbles[1::2] = packed >> 4
+        return nibbles[:self.__num_counters]
+
+    def set_values(self, values: np.ndarray):
+        """Overwrites all counters, saturating the values that do not fit and counting the increments lost."""
+        values = np.asarray(values, dtype=np.int64)
+        overflow = values - self.__max_value
+        self.__saturation_count += int(overflow[overflow > 0].sum())
+        values = np.clip(values, 0, self.__max_value)
+        if self.__sparse:
+            nonzero = np.flatnonzero(values)
+            self.__storage = dict(zip(nonzero.tolist(), values[nonzero].tolist()))
+            self.__densify_if_full()
+            return
+        if self.__counter_bits == 64:
+            self.__storage[:] = values
+            return
+        packed = np.frombuffer(self.__storage, dtype=np.uint8)
+        if self.__counter_bits == 8:
+            packed[:] = values
+            return
+        padded = np.zeros(len(packed) * 2, dtype=np.uint8)
+        padded[:self.__num_counters] = values
+        packed[:] = padded[0::2] | (padded[1::2] << 4)
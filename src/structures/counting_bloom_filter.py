@@ -3,82 +3,164 @@ import math
 import numpy as np
 import sys
 
-from sklearn.utils import murmurhash3_32
+from structures.counter_array import CounterArray
+from structures.hashing import BloomHashes
+from structures.simple_bloom_filter import BloomFilterSimple
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.DEBUG)
 
+DELTA_CHUNK_SIZE = 4096  # counters per dirty-tracking chunk
+
 class CountingBloomFilter:
     """
     CountingBloomFilter implements a counting bloom filter using an integer counter array of size n 
     and k hash functions. This allows insertions and deletions with a controlled false positive rate.
+    The hash mode picks between k seeded hashes ("seeded") and double hashing from one 64 bit digest ("double").
+    Counters are 64 bits by default; 4 or 8 bit counters are packed and saturate instead of wrapping.
+    A sparse filter keeps only its non-zero counters until it fills up enough to be cheaper dense, then switches to the dense array.
+    Every change bumps a version number and stamps the chunks of DELTA_CHUNK_SIZE counters it touched,
+    so a replica can be brought up to date with only the chunks changed since the version it last saw.
     """
 
-    def __init__(self, false_positive_rate=0.01, key_num=1e6):
+    def __init__(self, false_positive_rate=0.01, key_num=1e6, hash_mode="seeded", counter_bits=64, sparse=False):
         '''Initialize a counting bloom filter with a false positive rate and expected number of keys.'''
         self.__false_positive_rate = false_positive_rate
         self.__key_num = key_num
+        self.__hash_mode = hash_mode
+        self.__counter_bits = counter_bits
+        self.__sparse = sparse
+        self.__num_nonzero = 0
         self.__generate_counter_array()
         self.__generate_hash_functions()
+        self.__version = 0
+        self.__chunk_versions = np.zeros(math.ceil(len(self.__counter_array) / DELTA_CHUNK_SIZE), dtype=np.int64)
 
     def __generate_counter_array(self):
         '''Generates the counter array for the counting bloom filter.'''
         # Calculate the required number of counters to meet the desired false positive rate
         num_counters = math.ceil(self.__key_num * np.log(self.__false_positive_rate) / np.log(0.618))
-        self.__counter_array = np.zeros(num_counters, dtype=int)  # Use integer counters instead of bitarray (64 bits per counter for 64 bit systems)
+        self.__counter_array = CounterArray(num_counters, self.__counter_bits, self.__sparse)  # 64 bit dense counters unless packed or sparse counters are asked for
         logger.info("Generated an array of %d counters", len(self.__counter_array))
 
     def __generate_hash_functions(self):
         '''Generates a set of hash functions for the counting bloom filter.'''
-        
-        def hash_function_generator(size: int, limit: int) -> list:
-            """Generates a list of hash functions that return values within the counter array range."""
-            hash_functions = []
-
-            def hash_function(seed=1):
-                """Creates a hash function with the specified seed."""
-                def f(val) -> int:
-                    """Hashes the input and returns an index within the counter array range."""
-                    return murmurhash3_32(val, seed, positive=True) % limit
-                return f
-            
-            for i in range(size):
-                hash_functions.append(hash_function(i))
-            return hash_functions
-
         # Calculate the number of hash functions
         num_counters = len(self.__counter_array)
         num_hashes = math.floor(num_counters / self.__key_num * np.log(2))
-        self.__hash_functions = hash_function_generator(num_hashes, num_counters)
+        self.__hash_functions = BloomHashes(num_hashes, num_counters, self.__hash_mode)
         logger.info("Generated %d hash functions", len(self.__hash_functions))
 
     def insert(self, item) -> bool:
         """Inserts an item into the counting bloom filter by incrementing the relevant counters."""
-        for hash_function in self.__hash_functions:
-            index = hash_function(item)
-            self.__counter_array[index] += 1
+        self.__version += 1
+        for index in self.__hash_functions.indices(item):
+            self.__chunk_versions[index // DELTA_CHUNK_SIZE] = self.__version
+            if self.__counter_array.increment(index) == 0:
+                self.__num_nonzero += 1
         logger.debug("Inserted item")
         return True
 
     def remove(self, item) -> bool:
         """Removes an item from the counting bloom filter by decrementing the relevant counters."""
-        for hash_function in self.__hash_functions:
-            index = hash_function(item)
-            if self.__counter_array[index] > 0:
-                self.__counter_array[index] -= 1
+        self.__version += 1
+        for index in self.__hash_functions.indices(item):
+            self.__chunk_versions[index // DELTA_CHUNK_SIZE] = self.__version
+            if self.__counter_array.decrement(index) == 1:
+                self.__num_nonzero -= 1
         logger.debug("Removed item")
         return True
 
     def query(self, item) -> int:
         """Checks if an item is possibly in the set by verifying if all relevant counters are non-zero."""
         logger.debug("Querying item")
-        for hash_function in self.__hash_functions:
-            index = hash_function(item)
-            if self.__counter_array[index] == 0:
+        for index in self.__hash_functions.indices(item):
+            if self.__counter_array.get(index) == 0:
                 return 0  # Item is not in the set
         return 1  # Item is possibly in the set
 
+    def get_num_counters(self):
+        return len(self.__counter_array)
+
+    def get_num_hashes(self):
+        return len(self.__hash_functions)
+
+    def get_hash_mode(self):
+        return self.__hash_mode
+
+    def get_counter_bits(self):
+        return self.__counter_bits
+
+    def get_saturation_count(self):
+        return self.__counter_array.get_saturation_count()
+
+    def is_sparse(self):
+        return self.__counter_array.is_sparse()
+
+    def nbytes(self) -> int:
+        """Gets the number of bytes holding the counters."""
+        return self.__counter_array.nbytes()
+
+    def get_counter_array(self):
+        return self.__counter_array.values()
+
+    def popcount(self) -> int:
+        """Gets the number of non-zero counters. The count is kept up to date by every insertion and removal, so no scan is needed."""
+        return self.__num_nonzero
+
+    def fill_ratio(self) -> float:
+        """Gets the fraction of non-zero counters."""
+        return self.__num_nonzero / self.get_num_counters()
+
+    def estimated_cardinality(self) -> float:
+        """Estimates the number of distinct items currently stored with the Swamidass-Baldi estimator, -(m/k) * ln(1 - X/m) for X non-zero counters out of m."""
+        if self.__num_nonzero >= self.get_num_counters():
+            return math.inf
+        return -self.get_num_counters() / self.get_num_hashes() * math.log(1 - self.fill_ratio())
+
+    def current_false_positive_rate(self) -> float:
+        """Predicts the false positive rate of the filter in its current state, the chance that all k counters of a new item are non-zero."""
+        return self.fill_ratio() ** self.get_num_hashes()
+
+    def __check_compatible(self, other):
+        '''Makes sure another counting bloom filter hashes items to the same counters as this one.'''
+        if not isinstance(other, CountingBloomFilter):
+            raise Exception("Can only combine with another CountingBloomFilter.")
+        if (self.get_num_counters(), self.get_num_hashes(), self.__hash_mode) != (other.get_num_counters(), other.get_num_hashes(), other.get_hash_mode()):
+            raise Exception("Counting bloom filters have different parameters.")
+
+    def __combined(self, other, operation):
+        '''Builds a new counting bloom filter whose counters are operation applied to the counters of self and other.'''
+        self.__check_compatible(other)
+        combined = CountingBloomFilter(false_positive_rate=self.__false_positive_rate, key_num=self.__key_num, hash_mode=self.__hash_mode, counter_bits=self.__counter_bits, sparse=self.__sparse)
+        combined.__counter_array.set_values(operation(self.get_counter_array(), other.get_counter_array()))
+        combined.__num_nonzero = int(np.count_nonzero(combined.get_counter_array()))
+        combined.__mark_dirty(np.arange(len(combined.__chunk_versions)))
+        return combined
+
+    def union(self, other):
+        """Combines two counting bloom filters with the same parameters by adding their counters.
+
+        Returns the new counting bloom filter.
+        """
+        return self.__combined(other, np.add)
+
+    def intersection(self, other):
+        """Combines two counting bloom filters with the same parameters by taking the smaller of each pair of counters.
+
+        Returns the new counting bloom filter.
+        """
+        return self.__combined(other, np.minimum)
+
+    def merge_from(self, other):
+        """Adds the counters of another counting bloom filter with the same parameters into this one, in place."""
+        self.__check_compatible(other)
+        self.__counter_array.set_values(self.get_counter_array() + other.get_counter_array())
+        self.__num_nonzero = int(np.count_nonzero(self.get_counter_array()))
+        self.__mark_dirty(np.arange(len(self.__chunk_versions)))
+        logger.debug("Merged counting bloom filter")
+
     # def size(self) -> int:
     #     """Gets the memory size of the counting bloom filter."""
     #     logger.debug("Getting CountingBloomFilter size")
@@ -93,11 +175,115 @@ class CountingBloomFilter:
     def min_count(self, item) -> int:
         """Gets the minimum value stored corresponding to an item."""
         logger.debug("Getting min count")
-        cnts = np.array([])
-        for hash_function in self.__hash_functions:
-            index = hash_function(item)
-            cnts = np.append(cnts, self.__counter_array[index])
-        return min(cnts)
+        return min(self.__counter_array.get(index) for index in self.__hash_functions.indices(item))
+
+    def __index_matrix(self, items) -> np.ndarray:
+        '''Computes the counter indices of every item in a batch in one pass.'''
+        if not isinstance(items, np.ndarray):
+            items = list(items)
+        return self.__hash_functions.index_matrix(items)
+
+    def insert_many(self, items) -> np.ndarray:
+        """Inserts a batch of items by incrementing all of their counters in bulk.
+        The hashing is only batched for integer arrays or with hash_mode="double"; seeded hashing of strings still
+        calls murmurhash3_32 k times per item.
+        """
+        indices = self.__index_matrix(items)
+        self.__mark_dirty(np.unique(indices // DELTA_CHUNK_SIZE))
+        self.__num_nonzero += self.__counter_array.add_many(indices)
+        logger.debug("Inserted %d items", len(indices))
+        return np.ones(len(indices), dtype=bool)
+
+    def remove_many(self, items) -> np.ndarray:
+        """Removes a batch of items by decrementing all of their counters in bulk."""
+        indices = self.__index_matrix(items)
+        self.__mark_dirty(np.unique(indices // DELTA_CHUNK_SIZE))
+        self.__num_nonzero -= self.__counter_array.subtract_many(indices)
+        logger.debug("Removed %d items", len(indices))
+        return np.ones(len(indices), dtype=bool)
+
+    def query_many(self, items) -> np.ndarray:
+        """Checks which items of a batch are possibly in the set, returning a numpy boolean array.
+        As with insert_many, the hashing is only batched for integer arrays or with hash_mode="double".
+        """
+        logger.debug("Querying items")
+        return (self.__counter_array.get_many(self.__index_matrix(items)) > 0).all(axis=1)
+
+    def min_count_many(self, items) -> np.ndarray:
+        """Gets the minimum value stored corresponding to every item of a batch, returning a numpy integer array."""
+        logger.debug("Getting min counts")
+        return self.__counter_array.get_many(self.__index_matrix(items)).min(axis=1)
+
+    def freeze(self) -> BloomFilterSimple:
+        """Freezes the counting bloom filter into a read-only BloomFilterSimple with a bit set wherever a counter is non-zero.
+        Both filters size their arrays and hashes with the same formulas, so the frozen filter answers queries exactly like this one
+        with 1 bit per counter, but it can no longer remove items.
+
+        Returns the new bloom filter.
+        """
+        frozen = BloomFilterSimple.from_set_bits(self.__counter_array.values() > 0, false_positive_rate=self.__false_positive_rate, key_num=self.__key_num, hash_mode=self.__hash_mode)
+        logger.info("Froze counting bloom filter")
+        return frozen
+
+    @classmethod
+    def thaw(cls, frozen: BloomFilterSimple, items, counter_bits=64, sparse=False):
+        """Rebuilds a counting bloom filter with the parameters of a frozen filter from the authoritative items,
+        since the counts themselves are lost when freezing.
+
+        Returns the new counting bloom filter.
+        """
+        thawed = cls(false_positive_rate=frozen.get_false_positive_rate(), key_num=frozen.get_key_num(), hash_mode=frozen.get_hash_mode(), counter_bits=counter_bits, sparse=sparse)
+        thawed.insert_many(items)
+        logger.info("Thawed counting bloom filter")
+        return thawed
+
+    def get_version(self):
+        return self.__version
+
+    def __mark_dirty(self, chunks: np.ndarray):
+        '''Bumps the version and stamps it on the given chunks of counters.'''
+        self.__version += 1
+        self.__chunk_versions[chunks] = self.__version
+
+    def __chunk_indices(self, chunks: np.ndarray) -> np.ndarray:
+        '''Lists the counter indices covered by the given chunks, in order.'''
+        indices = (chunks[:, None] * DELTA_CHUNK_SIZE + np.arange(DELTA_CHUNK_SIZE)[None, :]).ravel()
+        return indices[indices < len(self.__counter_array)]
+
+    def export_delta(self, since_version=0) -> dict:
+        """Exports the chunks of counters changed after a given version, to be applied to a replica that is at since_version.
+        Pass the version of the previous delta to ship only what changed since then, or 0 for a full copy.
+
+        Returns a dict with the filter parameters, the version the delta brings a replica to, the changed chunk numbers,
+        and their counter values in the narrowest type that holds the counters.
+        """
+        chunks = np.flatnonzero(self.__chunk_versions > since_version).astype(np.int32)
+        values = self.__counter_array.get_many(self.__chunk_indices(chunks))
+        logger.debug("Exported %d of %d chunks", len(chunks), len(self.__chunk_versions))
+        return {
+            "num_counters": self.get_num_counters(),
+            "num_hashes": self.get_num_hashes(),
+            "hash_mode": self.__hash_mode,
+            "since_version": since_version,
+            "version": self.__version,
+            "chunks": chunks,
+            "values": values.astype(np.uint8) if self.__counter_bits != 64 else values,
+        }
+
+    def apply_delta(self, delta: dict):
+        """Overwrites the chunks of counters carried by a delta exported from a counting bloom filter with the same parameters.
+        The applied chunks count as changed here too, so this filter can pass them on to its own replicas.
+        """
+        if (delta["num_counters"], delta["num_hashes"], delta["hash_mode"]) != (self.get_num_counters(), self.get_num_hashes(), self.__hash_mode):
+            raise Exception("Delta comes from a counting bloom filter with different parameters.")
+        chunks = np.asarray(delta["chunks"], dtype=np.int64)
+        indices = self.__chunk_indices(chunks)
+        values = np.asarray(delta["values"], dtype=np.int64)
+        old = self.__counter_array.get_many(indices)
+        self.__counter_array.set_many(indices, values)
+        self.__num_nonzero += int(np.count_nonzero(values)) - int(np.count_nonzero(old))
+        self.__mark_dirty(chunks)
+        logger.debug("Applied %d chunks", len(chunks))
 
 # if __name__ == "__main__":
 #     cbf = CountingBloomFilter(false_positive_rate=0.01, key_num=1e6)
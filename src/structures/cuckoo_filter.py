@@ -1,42 +1,135 @@
 import random
+from functools import lru_cache
 from sklearn.utils import murmurhash3_32
 import logging
+import numpy as np
 import sys
 
+from structures.hashing import MASK64, digest64, digest64_batch, mix64, mix64_batch, murmur_batch
+
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
+
+STORAGE_MODES = ("list", "array")
+HASHING_MODES = ("integer", "bytes")
+EVICTION_MODES = ("random", "bfs")
+FINGERPRINT_TYPES = {1: np.uint8, 2: np.uint16, 3: np.uint32, 4: np.uint32, 5: np.uint64, 6: np.uint64, 7: np.uint64, 8: np.uint64}
+FINGERPRINT_HASH_SEED = 0x2545F491
+MAX_TABLE_FINGERPRINT_BITS = 16  # fingerprints up to this size get their hashes from a precomputed table
+INDEX_SEED = 0x51ED27
+
+@lru_cache(maxsize=None)
+def _fingerprint_hash_array(fingerprint_bits):
+    """Hashes every fingerprint of the given size once, shared by all filters using it.
+
+    Returns a numpy array where entry fp is the hash of fingerprint fp.
+    """
+    return murmur_batch(np.arange(1 << fingerprint_bits, dtype=np.int64), FINGERPRINT_HASH_SEED)
+
+@lru_cache(maxsize=None)
+def _fingerprint_hash_table(fingerprint_bits):
+    """Gets the fingerprint hashes as a list, which is faster to index one fingerprint at a time."""
+    return _fingerprint_hash_array(fingerprint_bits).tolist()
+
 class CuckooFilter:
-    def __init__(self, bucket_size=4, num_buckets=1e6//4, fingerprint_size=2, max_evictions=500):
+    """
+    CuckooFilter stores item fingerprints in num_buckets buckets of bucket_size slots, each item in one of two candidate buckets.
+    With storage="list" every bucket is a Python list of fingerprints.
+    With storage="array" all fingerprints live in one (num_buckets, bucket_size) unsigned integer NumPy array,
+    where 0 marks an empty slot and filled slots are packed at the front of their bucket, next to a per-bucket occupancy array,
+    so a slot costs only the fingerprint size and probing a bucket is one array comparison.
+    With hashing="integer" an item is hashed once to a 64 bit digest, whose top 8 * fingerprint_size bits give an integer fingerprint
+    (up to 8 bytes, never 0) and whose mix gives the primary bucket. The alternate bucket comes from a hash
+    of the fingerprint alone, looked up in a shared table for fingerprints of up to 16 bits or mixed with one multiplication above that,
+    so it maps each of the two buckets to the other. With the default hashing="bytes" fingerprints are bytes hashed through their hex string, as before.
+    When both buckets of an item are full, eviction="random" kicks random fingerprints along a walk of up to max_evictions moves,
+    while eviction="bfs" first searches breadth first through up to max_evictions buckets for the shortest chain of moves ending in
+    a free slot, then moves the fingerprints along it, so nothing moves and nothing is lost when no chain is found; it needs integer hashing.
+    With elastic=True, which also needs integer hashing, inserts never fail: the fingerprint left over by a failed insert goes to a chained overflow filter
+    with the same number of buckets and twice the bucket size, created when first needed. As the bucket count is shared,
+    the leftover fingerprint keeps its pair of candidate buckets, and queries and removals check every chained table.
+    Inserts try the free slots of every table in the chain first, so space freed by removals is reused, and only evict in the last one.
+    """
+    def __init__(self, bucket_size=4, num_buckets=1e6//4, fingerprint_size=2, max_evictions=500, storage="list", hashing="bytes", eviction="random", elastic=False):
+        if storage not in STORAGE_MODES:
+            raise Exception("Storage mode is invalid.")
+        if hashing not in HASHING_MODES:
+            raise Exception("Hashing mode is invalid.")
+        if eviction not in EVICTION_MODES:
+            raise Exception("Eviction mode is invalid.")
+        if eviction == "bfs" and hashing != "integer":
+            raise Exception("Breadth first eviction needs integer hashing.")
+        if elastic and hashing != "integer":
+            raise Exception("Elastic mode needs integer hashing.")
+        if (storage == "array" or hashing == "integer") and fingerprint_size not in FINGERPRINT_TYPES:
+            raise Exception("Fingerprint size is invalid.")
         self.bucket_size = bucket_size
         self.num_buckets = int(num_buckets)  # Ensure num_buckets is an integer
         self.fingerprint_size = fingerprint_size
         self.max_evictions = max_evictions
-        self.buckets = [[] for _ in range(self.num_buckets)]
+        self.storage = storage
+        self.hashing = hashing
+        self.eviction = eviction
+        self.elastic = elastic
+        self.overflow = None  # chained filter taking the fingerprints this one has no room for
+        self.fingerprint_bits = 8 * fingerprint_size
+        if hashing == "integer" and self.fingerprint_bits <= MAX_TABLE_FINGERPRINT_BITS:
+            self.fingerprint_hashes = _fingerprint_hash_table(self.fingerprint_bits)
+        else:
+            self.fingerprint_hashes = None
+        if storage == "list":
+            self.buckets = [[] for _ in range(self.num_buckets)]
+        else:
+            self.table = np.zeros((self.num_buckets, bucket_size), dtype=FINGERPRINT_TYPES[fingerprint_size])
+            self.occupancy = np.zeros(self.num_buckets, dtype=np.uint8 if bucket_size < 256 else np.uint32)
         self.count = 0
-        logger.info(f"CuckooFilter initialized with {self.num_buckets} buckets, "
-                    f"bucket size {self.bucket_size}, and fingerprint size {self.fingerprint_size} bytes.")
-    
+        self.moves = 0  # fingerprints moved by evictions so far
+        logger.info("CuckooFilter initialized with %d buckets, bucket size %d, and fingerprint size %d bytes.",
+                    self.num_buckets, self.bucket_size, self.fingerprint_size)
+
     def get_config(self):
         return {
             "bucket_size": self.bucket_size,
             "num_buckets": self.num_buckets,
             "fingerprint_size": self.fingerprint_size,
-            "max_evictions": self.max_evictions
+            "max_evictions": self.max_evictions,
+            "storage": self.storage,
+            "hashing": self.hashing,
+            "eviction": self.eviction,
+            "elastic": self.elastic
         }
 
+    def nbytes(self):
+        """Gets the number of bytes holding the fingerprints: the table and occupancy arrays, or the fingerprint bytes alone for lists,
+        summed over every chained table."""
+        overflow_bytes = 0 if self.overflow is None else self.overflow.nbytes()
+        if self.storage == "array":
+            return self.table.nbytes + self.occupancy.nbytes + overflow_bytes
+        return self.count * self.fingerprint_size + overflow_bytes
+
+    def __len__(self):
+        """Gets the number of fingerprints stored in this table and every chained one."""
+        return self.count + (0 if self.overflow is None else len(self.overflow))
+
+    def num_tables(self):
+        """Gets the number of chained tables, counting this one."""
+        return 1 + (0 if self.overflow is None else self.overflow.num_tables())
+
     def _hash(self, item):
         """Hash function using MurmurHash3 (32-bit)."""
         res = murmurhash3_32(item, positive=True)
-        logger.debug(f"Hashed item {item} with seed to {res}")
+        logger.debug("Hashed item %s with seed to %d", item, res)
         return res
 
     def _fingerprint(self, item):
         """Generates a fingerprint of the item."""
         item = str(item).encode()  # Ensure the item is bytes
         fp = self._hash(item) & ((1 << (self.fingerprint_size * 8)) - 1)
+        if fp == 0 and self.storage == "array":
+            fp = 1  # 0 marks an empty slot in the table
         byte_fp = fp.to_bytes(self.fingerprint_size, 'little')[:self.fingerprint_size]
-        logger.debug(f"Generated fingerprint {byte_fp} for item {item}")
+        logger.debug("Generated fingerprint %s for item %s", byte_fp, item)
         return byte_fp
 
     def _bucket_index(self, item, fp=None):
@@ -44,83 +137,359 @@ class CuckooFilter:
         if fp is None:
             fp = self._fingerprint(item)
         index = self._hash(fp.hex()) % self.num_buckets
-        logger.debug(f"Primary bucket index for fingerprint {fp} is {index}")
+        logger.debug("Primary bucket index for fingerprint %s is %d", fp, index)
         return index
 
     def _alternate_index(self, index, fp):
         """Calculates the alternate index."""
+        if self.hashing == "integer":
+            return self._alternate_index_int(index, fp)
         alt_index = (index ^ self._hash(fp.hex())) % self.num_buckets
-        logger.debug(f"Alternate index for fingerprint {fp} and index {index} is {alt_index}")
+        logger.debug("Alternate index for fingerprint %s and index %d is %d", fp, index, alt_index)
         return alt_index
 
+    def _fingerprint_hash(self, fp):
+        """Hashes an integer fingerprint, from the precomputed table when there is one."""
+        if self.fingerprint_hashes is not None:
+            return self.fingerprint_hashes[fp]
+        return ((fp * 0x9E3779B97F4A7C15) & MASK64) >> 32
+
+    def _alternate_index_int(self, index, fp):
+        """Calculates the alternate index of an integer fingerprint.
+        XOR with the fingerprint hash is its own inverse when num_buckets is a power of two;
+        for any other size, subtracting the index from the hash modulo num_buckets is.
+        """
+        fp_hash = self._fingerprint_hash(fp)
+        if self.num_buckets & (self.num_buckets - 1) == 0:
+            return (index ^ fp_hash) & (self.num_buckets - 1)
+        return (fp_hash - index) % self.num_buckets
+
+    def _locate(self, item):
+        """Computes the fingerprint and both candidate buckets of an item.
+
+        Returns a (fingerprint, primary index, alternate index) tuple.
+        """
+        if self.hashing == "bytes":
+            fp = self._fingerprint(item)
+            index1 = self._bucket_index(item, fp)
+            return fp, index1, self._alternate_index(index1, fp)
+        if not isinstance(item, (str, bytes)):
+            item = str(item)
+        digest = digest64(item)
+        fp = (digest >> (64 - self.fingerprint_bits)) or 1  # 0 marks an empty slot in the table
+        index1 = mix64(digest, INDEX_SEED) % self.num_buckets
+        return fp, index1, self._alternate_index_int(index1, fp)
+
+    def _locate_many(self, items):
+        """Computes the integer fingerprints and both candidate buckets of every item in a batch, like _locate.
+
+        Returns a (fingerprints, primary indices, alternate indices) tuple of numpy arrays.
+        """
+        items = [item if isinstance(item, (str, bytes)) else str(item) for item in items]
+        digests = digest64_batch(items)
+        fps = digests >> np.uint64(64 - self.fingerprint_bits)
+        fps[fps == 0] = 1
+        index1 = (mix64_batch(digests, INDEX_SEED) % np.uint64(self.num_buckets)).astype(np.int64)
+        if self.fingerprint_hashes is not None:
+            fp_hashes = _fingerprint_hash_array(self.fingerprint_bits)[fps.astype(np.int64)].astype(np.int64)
+        else:
+            fp_hashes = ((fps * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)).astype(np.int64)
+        if self.num_buckets & (self.num_buckets - 1) == 0:
+            index2 = (index1 ^ fp_hashes) & (self.num_buckets - 1)
+        else:
+            index2 = (fp_hashes - index1) % self.num_buckets
+        return fps, index1, index2
+
+    def _slot_value(self, fp):
+        """Converts a fingerprint to the integer stored in the table."""
+        return fp if self.hashing == "integer" else int.from_bytes(fp, 'little')
+
+    def _slot_fingerprint(self, value):
+        """Converts an integer read from the table back to a fingerprint."""
+        return int(value) if self.hashing == "integer" else int(value).to_bytes(self.fingerprint_size, 'little')
+
+    def _bucket_has_room(self, index):
+        """Checks whether a bucket has an empty slot."""
+        if self.storage == "array":
+            return self.occupancy[index] < self.bucket_size
+        return len(self.buckets[index]) < self.bucket_size
+
+    def _bucket_add(self, index, fp):
+        """Stores a fingerprint in the next empty slot of a bucket."""
+        if self.storage == "array":
+            self.table[index, self.occupancy[index]] = self._slot_value(fp)
+            self.occupancy[index] += 1
+        else:
+            self.buckets[index].append(fp)
+
+    def _bucket_contains(self, index, fp):
+        """Checks whether a bucket holds a fingerprint."""
+        if self.storage == "array":
+            return bool((self.table[index] == self._slot_value(fp)).any())
+        return fp in self.buckets[index]
+
+    def _bucket_remove(self, index, fp):
+        """Removes one copy of a fingerprint from a bucket, moving the last filled slot into its place."""
+        if self.storage == "array":
+            slot = np.flatnonzero(self.table[index] == self._slot_value(fp))[0]
+            last = self.occupancy[index] - 1
+            self.table[index, slot] = self.table[index, last]
+            self.table[index, last] = 0
+            self.occupancy[index] = last
+        else:
+            self.buckets[index].remove(fp)
+
+    def _bucket_get(self, index, slot):
+        """Reads the fingerprint in a slot of a bucket."""
+        if self.storage == "array":
+            return self._slot_fingerprint(self.table[index, slot])
+        return self.buckets[index][slot]
+
+    def _bucket_set(self, index, slot, fp):
+        """Overwrites the fingerprint in a filled slot of a bucket."""
+        if self.storage == "array":
+            self.table[index, slot] = self._slot_value(fp)
+        else:
+            self.buckets[index][slot] = fp
+
+    def _bucket_swap(self, index, fp):
+        """Replaces a random fingerprint of a full bucket with fp.
+
+        Returns the evicted fingerprint.
+        """
+        if self.storage == "array":
+            slot = random.randrange(self.bucket_size)
+            evicted_fp = self._slot_fingerprint(self.table[index, slot])
+            self.table[index, slot] = self._slot_value(fp)
+            return evicted_fp
+        evicted_fp = random.choice(self.buckets[index])
+        self.buckets[index].remove(evicted_fp)
+        self.buckets[index].append(fp)
+        return evicted_fp
+
     def insert(self, item):
         """Inserts an item into the filter."""
-        fp = self._fingerprint(item)
-        index1 = self._bucket_index(item)
-        index2 = self._alternate_index(index1, fp)
-
-        if len(self.buckets[index1]) < self.bucket_size:
-            self.buckets[index1].append(fp)
-            self.count += 1
-            logger.debug(f"Item {item} inserted into bucket {index1}")
-            return True
-        if len(self.buckets[index2]) < self.bucket_size:
-            self.buckets[index2].append(fp)
-            self.count += 1
-            logger.debug(f"Item {item} inserted into bucket {index2}")
+        fp, index1, index2 = self._locate(item)
+        return self._insert_located(item, fp, index1, index2)
+
+    def _insert_located(self, item, fp, index1, index2):
+        """Inserts a fingerprint into one of its two candidate buckets, evicting others if both are full.
+        Once a table has chained an overflow filter, it only takes fingerprints that find a free slot without evictions,
+        so space freed by removals is reused, and the others go on down the chain; only the last table evicts.
+        """
+        if self._place(item, fp, index1, index2):
             return True
+        if self.overflow is not None:
+            return self.overflow._insert_located(item, fp, index1, index2)
+
+        if self.eviction == "bfs":
+            return self._insert_bfs(item, fp, index1, index2)
 
         # Handle evictions
         index = random.choice([index1, index2])
         for evict_count in range(self.max_evictions):
-            evicted_fp = random.choice(self.buckets[index])
-            self.buckets[index].remove(evicted_fp)
-            self.buckets[index].append(fp)
-
-            fp = evicted_fp
+            fp = self._bucket_swap(index, fp)
             index = self._alternate_index(index, fp)
+            self.moves += 1
 
-            if len(self.buckets[index]) < self.bucket_size:
-                self.buckets[index].append(fp)
+            if self._bucket_has_room(index):
+                self._bucket_add(index, fp)
                 self.count += 1
-                logger.debug(f"Item {item} inserted after {evict_count + 1} evictions")
+                logger.debug("Item %s inserted after %d evictions", item, evict_count + 1)
                 return True
 
-        logger.warning(f"Item {item} failed to insert after {self.max_evictions} evictions")
+        if self.elastic:
+            return self._overflow_insert(item, fp, index, self._alternate_index(index, fp))
+        logger.warning("Item %s failed to insert after %d evictions", item, self.max_evictions)
+        return False
+
+    def _place(self, item, fp, index1, index2):
+        """Stores a fingerprint in a free slot of one of its two candidate buckets, without evicting anything.
+
+        Returns True if the fingerprint was stored.
+        """
+        for index in (index1, index2):
+            if self._bucket_has_room(index):
+                self._bucket_add(index, fp)
+                self.count += 1
+                logger.debug("Item %s inserted into bucket %d", item, index)
+                return True
         return False
 
+    def _overflow_insert(self, item, fp, index1, index2):
+        """Hands a fingerprint this table has no room for to the chained overflow filter, creating it first if needed."""
+        if self.overflow is None:
+            self.overflow = CuckooFilter(bucket_size=2 * self.bucket_size, num_buckets=self.num_buckets, fingerprint_size=self.fingerprint_size,
+                                         max_evictions=self.max_evictions, storage=self.storage, hashing=self.hashing,
+                                         eviction=self.eviction, elastic=True)
+            logger.info("Chained a cuckoo table of bucket size %d", self.overflow.bucket_size)
+        return self.overflow._insert_located(item, fp, index1, index2)
+
+    def _eviction_path(self, index1, index2):
+        """Searches breadth first from two full buckets for the closest bucket with a free slot, visiting at most max_evictions buckets.
+        Every full bucket leads to the alternate bucket of each fingerprint it holds.
+
+        Returns the path as a list of (bucket, slot) pairs from a starting bucket to the free one, where each slot holds
+        the fingerprint to move into the next bucket, or None if no free slot was found.
+        """
+        nodes = [(index1, -1, -1)] if index1 == index2 else [(index1, -1, -1), (index2, -1, -1)]
+        visited = {index1, index2}
+        head = 0
+        while head < len(nodes) and len(visited) < self.max_evictions:
+            index = nodes[head][0]
+            for slot in range(self.bucket_size):
+                alt_index = self._alternate_index(index, self._bucket_get(index, slot))
+                if alt_index in visited:
+                    continue
+                visited.add(alt_index)
+                nodes.append((alt_index, head, slot))
+                if self._bucket_has_room(alt_index):
+                    path = [(alt_index, None)]
+                    node = len(nodes) - 1
+                    while nodes[node][1] != -1:
+                        _, parent, parent_slot = nodes[node]
+                        path.append((nodes[parent][0], parent_slot))
+                        node = parent
+                    return path[::-1]
+            head += 1
+        return None
+
+    def _insert_bfs(self, item, fp, index1, index2):
+        """Inserts a fingerprint whose buckets are both full by moving the fingerprints along the shortest eviction path, last one first."""
+        path = self._eviction_path(index1, index2)
+        if path is None:
+            if self.elastic:
+                return self._overflow_insert(item, fp, index1, index2)
+            logger.warning("Item %s failed to insert, no free slot within %d buckets", item, self.max_evictions)
+            return False
+        # the last bucket has room, so each fingerprint moves into the slot its successor just left
+        self._bucket_add(path[-1][0], self._bucket_get(*path[-2]))
+        for step in range(len(path) - 2, 0, -1):
+            self._bucket_set(*path[step], self._bucket_get(*path[step - 1]))
+        self._bucket_set(*path[0], fp)
+        self.count += 1
+        self.moves += len(path) - 1
+        logger.debug("Item %s inserted after %d evictions", item, len(path) - 1)
+        return True
+
+    def _place_many(self, indices, fps):
+        """Stores a batch of fingerprints in the free slots of the given buckets of the table, in bucket order.
+        Fingerprints sharing a bucket take its free slots one after another until the bucket is full.
+
+        Returns a numpy boolean array that is True where the fingerprint was stored.
+        """
+        order = np.argsort(indices, kind="stable")
+        sorted_indices = indices[order]
+        positions = np.arange(len(indices))
+        starts = np.ones(len(indices), dtype=bool)
+        starts[1:] = sorted_indices[1:] != sorted_indices[:-1]
+        ranks = np.empty(len(indices), dtype=np.int64)
+        ranks[order] = positions - np.maximum.accumulate(np.where(starts, positions, 0))
+        slots = self.occupancy[indices].astype(np.int64) + ranks
+        placed = slots < self.bucket_size
+        self.table[indices[placed], slots[placed]] = fps[placed]
+        self.occupancy += np.bincount(indices[placed], minlength=self.num_buckets).astype(self.occupancy.dtype)
+        return placed
+
+    def insert_many(self, items):
+        """Inserts a batch of items into the filter.
+        With array storage and integer hashing, every item first goes to a free slot of its primary bucket, then of its
+        alternate bucket, in two vectorized passes; only the items left over run the eviction loop one at a time.
+
+        Returns a numpy boolean array holding, for each item, whether it was inserted.
+        """
+        items = list(items)
+        if self.hashing == "bytes":
+            return np.array([self.insert(item) for item in items], dtype=bool)
+        inserted = self._insert_many_located(items, *self._locate_many(items))
+        logger.debug("Inserted %d items", len(items))
+        return inserted
+
+    def _insert_many_located(self, items, fps, index1, index2):
+        """Inserts a batch of located fingerprints. Like single inserts, a table that has chained an overflow filter
+        only takes the fingerprints that find a free slot without evictions and passes the rest down the chain.
+        """
+        if self.storage == "list":
+            return np.array([self._insert_located(items[i], int(fps[i]), int(index1[i]), int(index2[i]))
+                             for i in range(len(items))], dtype=bool)
+        fps = fps.astype(self.table.dtype)
+        inserted = self._place_many(index1, fps)
+        pending = np.flatnonzero(~inserted)
+        inserted[pending] = self._place_many(index2[pending], fps[pending])
+        self.count += int(np.count_nonzero(inserted))
+        if self.overflow is not None:
+            pending = np.flatnonzero(~inserted)
+            inserted[pending] = self.overflow._insert_many_located([items[i] for i in pending], fps[pending],
+                                                                   index1[pending], index2[pending])
+            return inserted
+        for i in np.flatnonzero(~inserted):
+            inserted[i] = self._insert_located(items[i], int(fps[i]), int(index1[i]), int(index2[i]))
+        logger.debug("Inserted %d items", len(items))
+        return inserted
+
     def query(self, item):
         """Checks if an item might be in the filter."""
-        fp = self._fingerprint(item)
-        index1 = self._bucket_index(item)
-        index2 = self._alternate_index(index1, fp)
-
-        found = fp in self.buckets[index1] or fp in self.buckets[index2]
-        logger.debug(
-        f"Query for {item}: {'Found' if found else 'Not found'} "
-        f"(Bucket1: {index1}, Present: {fp in self.buckets[index1]}), "
-        f"(Bucket2: {index2}, Present: {fp in self.buckets[index2]})"
-    )
+        fp, index1, index2 = self._locate(item)
+
+        found = self._contains_located(fp, index1, index2)
+        logger.debug("Query for %s: %s (Bucket1: %d, Bucket2: %d)", item, "Found" if found else "Not found", index1, index2)
         return int(found)
 
+    def _contains_located(self, fp, index1, index2):
+        """Checks both candidate buckets of a fingerprint in this table and every chained one."""
+        if self._bucket_contains(index1, fp) or self._bucket_contains(index2, fp):
+            return True
+        return self.overflow is not None and self.overflow._contains_located(fp, index1, index2)
+
+    def query_many(self, items):
+        """Checks which items of a batch might be in the filter.
+        With array storage and integer hashing, both candidate buckets of every item are gathered from the table and
+        compared against its fingerprint at once.
+
+        Returns a numpy boolean array that is True where the item may exist.
+        """
+        items = list(items)
+        if self.hashing == "bytes":
+            return np.array([self.query(item) for item in items], dtype=bool)
+        logger.debug("Queried %d items", len(items))
+        return self._contains_many(*self._locate_many(items))
+
+    def _contains_many(self, fps, index1, index2):
+        """Checks the candidate buckets of a batch of fingerprints, passing the ones not found here on to the chained table."""
+        if self.storage == "list":
+            found = np.array([int(fps[i]) in self.buckets[index1[i]] or int(fps[i]) in self.buckets[index2[i]]
+                              for i in range(len(fps))], dtype=bool)
+        else:
+            table_fps = fps.astype(self.table.dtype)[:, None]
+            found = (self.table[index1] == table_fps).any(axis=1) | (self.table[index2] == table_fps).any(axis=1)
+        if self.overflow is not None:
+            pending = np.flatnonzero(~found)
+            found[pending] = self.overflow._contains_many(fps[pending], index1[pending], index2[pending])
+        return found
+
     def remove(self, item):
         """Deletes an item from the filter, if it exists."""
-        fp = self._fingerprint(item)
-        index1 = self._bucket_index(item)
-        index2 = self._alternate_index(index1, fp)
+        fp, index1, index2 = self._locate(item)
+        removed = self._remove_located(item, fp, index1, index2)
+        if not removed:
+            logger.error("Item %s not found for removal", item)
+        return removed
 
+    def _remove_located(self, item, fp, index1, index2):
+        """Deletes a fingerprint from its candidate buckets, or else from the first chained table holding it."""
         removed = False
-        if fp in self.buckets[index1]:
-            self.buckets[index1].remove(fp)
+        if self._bucket_contains(index1, fp):
+            self._bucket_remove(index1, fp)
+            self.count -= 1
             removed = True
-            logger.debug(f"Item {item} removed from bucket 1: {index1}")
-        if fp in self.buckets[index2]:
-            self.buckets[index2].remove(fp)
+            logger.debug("Item %s removed from bucket 1: %d", item, index1)
+        if self._bucket_contains(index2, fp):
+            self._bucket_remove(index2, fp)
+            self.count -= 1
             removed = True
-            logger.debug(f"Item {item} removed from bucket 2: {index2}")
-        
-        if not removed:
-            logger.error(f"Item {item} not found for removal")
+            logger.debug("Item %s removed from bucket 2: %d", item, index2)
+        if not removed and self.overflow is not None:
+            return self.overflow._remove_located(item, fp, index1, index2)
         return removed
     
     # def size(self):
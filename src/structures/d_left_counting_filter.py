@@ -0,0 +1,196 @@
+import logging
+import math
+import numpy as np
+
+from structures.hashing import digest64
+
+# Set up logging
+logger = logging.getLogger()
+logger.setLevel(logging.DEBUG)
+
+# Multipliers of the per-table permutations; all are odd primes, so they are invertible modulo most fingerprint ranges
+PERMUTATION_MULTIPLIERS = (2654435761, 2246822519, 3266489917, 668265263, 374761393, 3323784893, 2870177453, 1609587929)
+
+class DLeftCountingFilter:
+    """
+    DLeftCountingFilter implements a d-left counting bloom filter: num_tables subtables of buckets holding bucket_size cells,
+    where every cell stores a fingerprint remainder and a small counter.
+    An item gets one fingerprint, which each subtable permutes into its own (bucket, remainder) pair.
+    Because the permutations are invertible, two items sharing a bucket and remainder in one subtable share them in every subtable,
+    so an item's fingerprint lives in at most one cell and deletions never hit the wrong item.
+    A new fingerprint goes to the least loaded of its buckets, ties going to the leftmost, which keeps buckets evenly filled,
+    and every operation reads num_tables buckets instead of k scattered counters.
+    Every cell packs its remainder and a counter_bits bit counter into remainder_bits + counter_bits bits of one bit-packed byte array,
+    so a cell takes no more bits than it holds. Counters saturate at 2^counter_bits - 1, after which the cell is never decremented.
+    """
+
+    def __init__(self, false_positive_rate=0.01, key_num=1e6, num_tables=4, bucket_size=8, target_load=6, counter_bits=4):
+        '''Initialize a d-left counting bloom filter, with false positive rate set to 0.01 and expected number of keys set to 1 million.'''
+        if not 1 <= num_tables <= len(PERMUTATION_MULTIPLIERS) or not 0 < target_load <= bucket_size:
+            raise Exception("Table configuration is invalid.")
+        if not 1 <= counter_bits <= 8:
+            raise Exception("Counter size is invalid.")
+        self.__false_positive_rate = false_positive_rate
+        self.__key_num = key_num
+        self.__num_tables = num_tables
+        self.__bucket_size = bucket_size
+        self.__num_buckets = max(1, math.ceil(key_num / (num_tables * target_load)))
+        # a query compares its remainder against about key_num / num_buckets stored ones, each matching with chance 2^-r
+        self.__remainder_bits = min(32, max(1, math.ceil(math.log2(key_num / self.__num_buckets / false_positive_rate))))
+        # the permutations are only invertible if no multiplier shares a factor with the fingerprint range
+        while any(math.gcd(multiplier, self.__num_buckets) != 1 for multiplier in PERMUTATION_MULTIPLIERS[:num_tables]):
+            self.__num_buckets += 1
+        self.__fingerprint_range = self.__num_buckets << self.__remainder_bits
+        self.__counter_bits = counter_bits
+        self.__max_count = (1 << counter_bits) - 1
+        self.__cell_bits = self.__remainder_bits + counter_bits
+        self.__num_items = 0
+        self.__saturation_count = 0
+        self.__generate_tables()
+        logger.info("Initialized a d-left counting filter with %d tables of %d buckets", num_tables, self.__num_buckets)
+
+    def __generate_tables(self):
+        '''Generates the bit-packed cells of every subtable, cell (table, bucket, slot) at position (table * B + bucket) * c + slot.
+        A cell holds its remainder above its counter, and a counter of 0 marks an empty cell.'''
+        num_cells = self.__num_tables * self.__num_buckets * self.__bucket_size
+        # 8 bytes of padding let the last cell be read as a whole 64 bit word
+        self.__cells = np.zeros(math.ceil(num_cells * self.__cell_bits / 8) + 8, dtype=np.uint8)
+        self.__slots = np.arange(self.__bucket_size, dtype=np.int64)
+        self.__table_offsets = np.arange(self.__num_tables, dtype=np.int64) * self.__num_buckets
+        logger.debug("Generated %d cells of %d bit remainders and %d bit counters", num_cells, self.__remainder_bits, self.__counter_bits)
+
+    def __read(self, cells: np.ndarray)->np.ndarray:
+        '''Reads the packed values of an array of cell positions, by loading the 64 bit word starting at each cell's first byte.'''
+        bits = cells * self.__cell_bits
+        words = self.__cells[(bits >> 3)[..., None] + np.arange(8)].view("<u8")[..., 0]
+        return (words >> (bits & 7).astype(np.uint64)) & np.uint64((1 << self.__cell_bits) - 1)
+
+    def __write(self, cell: int, value: int):
+        '''Writes the packed value of one cell, leaving the bits of its neighbours untouched.'''
+        bit = cell * self.__cell_bits
+        byte, shift = bit >> 3, bit & 7
+        word = int.from_bytes(self.__cells[byte:byte + 8].tobytes(), "little")
+        word = (word & ~(((1 << self.__cell_bits) - 1) << shift)) | (value << shift)
+        self.__cells[byte:byte + 8] = np.frombuffer(word.to_bytes(8, "little"), dtype=np.uint8)
+
+    def get_num_tables(self):
+        return self.__num_tables
+
+    def get_num_buckets(self):
+        return self.__num_buckets
+
+    def get_bucket_size(self):
+        return self.__bucket_size
+
+    def get_remainder_bits(self):
+        return self.__remainder_bits
+
+    def get_counter_bits(self):
+        return self.__counter_bits
+
+    def get_saturation_count(self):
+        return self.__saturation_count
+
+    def __len__(self):
+        return self.__num_items
+
+    def nbytes(self)->int:
+        """Gets the number of bytes holding the cells."""
+        return self.__cells.nbytes
+
+    def load_factor(self)->float:
+        """Gets the share of cells in use."""
+        num_cells = self.__num_tables * self.__num_buckets * self.__bucket_size
+        counters = self.__read(np.arange(num_cells, dtype=np.int64)) & np.uint64(self.__max_count)
+        return np.count_nonzero(counters) / num_cells
+
+    def __locations(self, item):
+        '''Permutes the fingerprint of an item into its (bucket, remainder) pair in every subtable.
+
+        Returns the cell positions of the item's bucket in every subtable, one row per subtable, and the item's remainder in every subtable.
+        '''
+        fingerprint = digest64(item) % self.__fingerprint_range
+        mask = (1 << self.__remainder_bits) - 1
+        buckets = np.empty(self.__num_tables, dtype=np.int64)
+        remainders = np.empty(self.__num_tables, dtype=np.uint64)
+        for table in range(self.__num_tables):
+            permuted = (PERMUTATION_MULTIPLIERS[table] * fingerprint + table) % self.__fingerprint_range
+            buckets[table], remainders[table] = permuted >> self.__remainder_bits, permuted & mask
+        cells = (self.__table_offsets + buckets)[:, None] * self.__bucket_size + self.__slots[None, :]
+        return cells, remainders
+
+    def __find(self, cells: np.ndarray, remainders: np.ndarray):
+        '''Finds the cell holding an item's remainder in one of its buckets, leftmost subtable first.
+
+        Returns the cell position and packed value of the match, or None and None, followed by the counters of all of the item's buckets.
+        '''
+        values = self.__read(cells)
+        counters = values & np.uint64(self.__max_count)
+        matches = np.flatnonzero(((values >> np.uint64(self.__counter_bits)) == remainders[:, None]) & (counters > 0))
+        if len(matches) > 0:
+            return int(cells.flat[matches[0]]), int(values.flat[matches[0]]), counters
+        return None, None, counters
+
+    def insert(self, item)->bool:
+        """Inserts an item, incrementing its cell if its fingerprint is already stored.
+
+        Returns a boolean representing successful insertion.
+        An insertion is unsuccessful if all of the item's buckets are full.
+        """
+        cells, remainders = self.__locations(item)
+        cell, value, counters = self.__find(cells, remainders)
+        if cell is not None:
+            if value & self.__max_count == self.__max_count:
+                self.__saturation_count += 1
+            else:
+                self.__write(cell, value + 1)
+            self.__num_items += 1
+            logger.debug("Incremented item")
+            return True
+        loads = np.count_nonzero(counters, axis=1)
+        table = int(np.argmin(loads))  # argmin picks the leftmost of equally loaded buckets
+        if loads[table] == self.__bucket_size:
+            logger.warning("All buckets of the item are full")
+            return False
+        free = np.flatnonzero(counters[table] == 0)[0]
+        self.__write(int(cells[table, free]), (int(remainders[table]) << self.__counter_bits) | 1)
+        self.__num_items += 1
+        logger.debug("Inserted item")
+        return True
+
+    def remove(self, item)->bool:
+        """Removes an item by decrementing its cell, freeing the cell once the count reaches 0.
+
+        Returns a boolean representing successful removal.
+        A removal is unsuccessful if the item's fingerprint is not stored.
+        """
+        cell, value, _ = self.__find(*self.__locations(item))
+        if cell is None:
+            logger.debug("Item is not found")
+            return False
+        count = value & self.__max_count
+        if count < self.__max_count:
+            # a freed cell is cleared entirely, so its stale remainder never matches again
+            self.__write(cell, value - 1 if count > 1 else 0)
+        self.__num_items -= 1
+        logger.debug("Removed item")
+        return True
+
+    def query(self, item)->int:
+        """Checks the d-left counting filter for a given item's existence.
+
+        Returns 1 if exists, 0 otherwise.
+        """
+        if self.__find(*self.__locations(item))[0] is not None:
+            logger.debug("Item is found")
+            return 1
+        logger.debug("Item is not found")
+        return 0
+
+    def min_count(self, item)->int:
+        """Gets the count stored for an item, an upper bound of how many times it was inserted.
+
+        Returns the count, or 0 if the item's fingerprint is not stored.
+        """
+        cell, value, _ = self.__find(*self.__locations(item))
+        return 0 if cell is None else value & self.__max_count
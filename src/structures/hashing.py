@@ -0,0 +1,153 @@
+import numpy as np
+
+from sklearn.utils import murmurhash3_32
+
+# Seeds of the two murmurhash3_32 halves that make up a 64 bit digest
+DIGEST_SEEDS = (0x5bd1e995, 0x1b873593)
+HASH_MODES = ("seeded", "double")
+INT32_MIN, INT32_MAX = -(1 << 31), (1 << 31) - 1
+MASK64 = (1 << 64) - 1
+
+def murmur_batch(items, seed=0)->np.ndarray:
+    """Hashes a batch of items with murmurhash3_32 using the given seed.
+    Integer numpy arrays are hashed in a single vectorized call, any other batch is hashed item by item.
+    Like murmurhash3_32 on a single integer, integers outside the 32 bit signed range raise an OverflowError.
+
+    Returns a numpy array of unsigned 64 bit hash values, one per item.
+    """
+    if isinstance(items, np.ndarray) and items.dtype.kind in "iu":
+        if items.size > 0 and (int(items.min()) < INT32_MIN or int(items.max()) > INT32_MAX):
+            raise OverflowError("Integer items must fit in 32 bit signed integers.")
+        return murmurhash3_32(items.astype(np.int32), seed, positive=True).astype(np.uint64)
+    return np.fromiter((murmurhash3_32(item, seed, positive=True) for item in items), dtype=np.uint64, count=len(items))
+
+def digest64(item)->int:
+    """Computes a 64 bit digest of an item from two differently seeded murmurhash3_32 halves.
+
+    Returns the digest as a Python integer.
+    """
+    return (murmurhash3_32(item, DIGEST_SEEDS[0], positive=True) << 32) | murmurhash3_32(item, DIGEST_SEEDS[1], positive=True)
+
+def digest64_batch(items)->np.ndarray:
+    """Computes the 64 bit digest of every item in a batch.
+
+    Returns a numpy array of unsigned 64 bit digests, one per item.
+    """
+    return (murmur_batch(items, DIGEST_SEEDS[0]) << np.uint64(32)) | murmur_batch(items, DIGEST_SEEDS[1])
+
+def mix64(digest: int, seed: int)->int:
+    """Mixes a 64 bit digest with a seed using the murmur3 64 bit finalizer, so every output bit depends on every input bit.
+
+    Returns the mixed value as a Python integer.
+    """
+    h = (digest + seed * 0x9E3779B97F4A7C15) & MASK64
+    h = ((h ^ (h >> 33)) * 0xFF51AFD7ED558CCD) & MASK64
+    h = ((h ^ (h >> 33)) * 0xC4CEB9FE1A85EC53) & MASK64
+    return h ^ (h >> 33)
+
+def mix64_batch(digests: np.ndarray, seed: int)->np.ndarray:
+    """Mixes an array of 64 bit digests with a seed, like mix64.
+
+    Returns a numpy array of unsigned 64 bit mixed values.
+    """
+    h = digests + np.uint64((seed * 0x9E3779B97F4A7C15) & MASK64)
+    h = (h ^ (h >> np.uint64(33))) * np.uint64(0xFF51AFD7ED558CCD)
+    h = (h ^ (h >> np.uint64(33))) * np.uint64(0xC4CEB9FE1A85EC53)
+    return h ^ (h >> np.uint64(33))
+
+def hash_function_generator(size: int, limit: int)->list:
+    """
+    A function that generates a list of size hash functions.
+    The hash functions will generate any integer value in range (0, limit).
+
+    Returns a list of hash functions.
+    """
+    hash_functions = []
+
+    def hash_function(seed=1):
+        """Hash function wrapper to set the seed.
+
+        Returns a hash function with the specified seed.
+        """
+        def f(val)->int:
+            """Wrapper for murmurhash3_32.
+
+            Returns the hashed value.
+            """
+            return murmurhash3_32(val, seed, positive=True) % limit
+        return f
+
+    for i in range(size):
+        hash_functions.append(hash_function(i))
+    return hash_functions
+
+def seeded_index_matrix(items, num_hashes: int, limit: int)->np.ndarray:
+    """Computes the index of every item under num_hashes seeded murmurhash3_32 functions.
+    Column i matches the hash function seeded with i, taken modulo limit.
+    Only integer arrays are hashed in num_hashes vectorized calls; strings and other items still take
+    num_hashes murmurhash3_32 calls each, as the seeded functions cannot be derived from one digest.
+
+    Returns a (len(items), num_hashes) numpy array of indices.
+    """
+    matrix = np.empty((len(items), num_hashes), dtype=np.int64)
+    for seed in range(num_hashes):
+        matrix[:, seed] = murmur_batch(items, seed) % np.uint64(limit)
+    return matrix
+
+def double_hash_index_matrix(items, num_hashes: int, limit: int)->np.ndarray:
+    """Computes num_hashes indices of every item from its 64 bit digest with Kirsch-Mitzenmacher double hashing.
+    Index i of an item is (h1 + i * h2) modulo limit, where h1 and h2 are the two 32 bit halves of the digest.
+
+    Returns a (len(items), num_hashes) numpy array of indices.
+    """
+    digests = digest64_batch(items)
+    h1 = digests >> np.uint64(32)
+    h2 = digests & np.uint64(0xFFFFFFFF)
+    steps = np.arange(num_hashes, dtype=np.uint64)
+    return ((h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(limit)).astype(np.int64)
+
+class BloomHashes:
+    """
+    BloomHashes maps items to the k slots of a bloom filter style array of a given size.
+    In "seeded" mode every slot comes from its own seeded murmurhash3_32, so each item costs k hashes.
+    In "double" mode all k slots are derived from one 64 bit digest with Kirsch-Mitzenmacher double hashing,
+    which keeps the false positive rate of k independent hashes at the cost of two murmurhash3_32 calls.
+    """
+
+    def __init__(self, num_hashes: int, limit: int, hash_mode="seeded"):
+        '''Initialize num_hashes hash functions over the range (0, limit) using the given hash mode.'''
+        if hash_mode not in HASH_MODES:
+            raise Exception("Hash mode is invalid.")
+        self.__num_hashes = num_hashes
+        self.__limit = limit
+        self.__hash_mode = hash_mode
+        self.__hash_functions = hash_function_generator(num_hashes, limit) if hash_mode == "seeded" else []
+
+    def __len__(self):
+        return self.__num_hashes
+
+    def get_hash_mode(self):
+        return self.__hash_mode
+
+    def get_limit(self):
+        return self.__limit
+
+    def indices(self, item):
+        """Hashes an item to its slots. Seeded slots are computed lazily so callers may stop early.
+
+        Returns an iterable of indices.
+        """
+        if self.__hash_mode == "seeded":
+            return (hash_function(item) for hash_function in self.__hash_functions)
+        digest = digest64(item)
+        h1, h2 = digest >> 32, digest & 0xFFFFFFFF
+        return [(h1 + i * h2) % self.__limit for i in range(self.__num_hashes)]
+
+    def index_matrix(self, items)->np.ndarray:
+        """Hashes a batch of items to their slots in one pass.
+
+        Returns a (len(items), k) numpy array of indices.
+        """
+        if self.__hash_mode == "seeded":
+            return seeded_index_matrix(items, self.__num_hashes, self.__limit)
+        return double_hash_index_matrix(items, self.__num_hashes, self.__limit)
@@ -0,0 +1,197 @@
+import logging
+import math
+import numpy as np
+
+from structures.hashing import digest64, digest64_batch
+
+# Set up logging
+logger = logging.getLogger()
+logger.setLevel(logging.DEBUG)
+
+SPARSE_PRECISION = 25  # index bits of a sparse entry
+SPARSE_RANK_BITS = 6  # a sparse entry is its index shifted left past its rank
+SPARSE_BUFFER_SIZE = 1024  # sparse entries collected before they are sorted into the sparse list
+
+def _bit_length(values: np.ndarray)->np.ndarray:
+    '''Computes the bit length of every value of an unsigned 64 bit array, like int.bit_length.'''
+    values = values.copy()
+    lengths = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        wide = values >= np.uint64(1 << shift)
+        lengths[wide] += shift
+        values[wide] >>= np.uint64(shift)
+    return lengths + (values > 0)
+
+def _sigma(x: float)->float:
+    '''The sigma series of Ertl's improved estimator, correcting for registers that are still 0.'''
+    if x == 1:
+        return math.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous = z
+        z += x * y
+        y += y
+        if z == previous:
+            return z
+
+def _tau(x: float)->float:
+    '''The tau series of Ertl's improved estimator, correcting for registers that hit their maximum value.'''
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = math.sqrt(x)
+        previous = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+def _improved_estimate(histogram: np.ndarray, num_registers: int)->float:
+    '''Estimates a cardinality from the histogram of register values, where histogram[k] counts registers holding k.'''
+    max_rank = len(histogram) - 1
+    z = num_registers * _tau(1 - histogram[max_rank] / num_registers)
+    for rank in range(max_rank - 1, 0, -1):
+        z = 0.5 * (z + histogram[rank])
+    z += num_registers * _sigma(histogram[0] / num_registers)
+    return num_registers * num_registers / (2 * math.log(2) * z)
+
+class HyperLogLog:
+    """
+    HyperLogLog implements a mergeable HyperLogLog sketch estimating the number of distinct items added, in 2^precision registers.
+    Items are hashed to 64 bit digests with the project's murmurhash3_32 digest: the top precision bits pick a register,
+    which keeps the largest rank (position of the first 1 bit) of the remaining bits.
+    A new sketch is sparse: it keeps a sorted list of (25 bit index, rank) entries, which is exact for small counts,
+    and turns into dense registers once the list would take more room than them.
+    The count uses Ertl's improved estimator, which corrects the bias of the raw estimate at small and large cardinalities
+    without empirical bias tables.
+    """
+
+    def __init__(self, precision=14, sparse=True):
+        '''Initialize a HyperLogLog sketch of 2^precision registers, set to 2^14 for a standard error of about 0.8%.'''
+        if not 4 <= precision <= 18:
+            raise Exception("Precision is invalid.")
+        self.__precision = precision
+        self.__num_registers = 1 << precision
+        self.__registers = None
+        self.__sparse_list = np.zeros(0, dtype=np.uint64)
+        self.__sparse_buffer = []
+        if not sparse:
+            self.__to_dense()
+        logger.info("Initialized a HyperLogLog sketch of %d registers", self.__num_registers)
+
+    def get_precision(self):
+        return self.__precision
+
+    def is_sparse(self)->bool:
+        return self.__registers is None
+
+    def nbytes(self)->int:
+        """Gets the number of bytes holding the registers or sparse entries."""
+        if self.__registers is not None:
+            return self.__registers.nbytes
+        return self.__sparse_list.nbytes + 8 * len(self.__sparse_buffer)
+
+    def __flush(self, new_entries=None):
+        '''Sorts the buffered sparse entries, and any new ones, into the sparse list, keeping the largest rank of every index,
+        and switches to dense registers if the list has grown past their size.'''
+        if len(self.__sparse_buffer) > 0 or new_entries is not None:
+            parts = [self.__sparse_list, np.array(self.__sparse_buffer, dtype=np.uint64)]
+            if new_entries is not None:
+                parts.append(new_entries)
+            entries = np.sort(np.concatenate(parts))
+            indices = entries >> np.uint64(SPARSE_RANK_BITS)
+            # entries of one index are sorted by rank, so the last one holds the largest
+            self.__sparse_list = entries[np.append(indices[1:] != indices[:-1], True)]
+            self.__sparse_buffer = []
+        if self.__registers is None and len(self.__sparse_list) * 8 > self.__num_registers:
+            self.__to_dense()
+
+    def __dense_registers(self)->np.ndarray:
+        '''Computes the dense registers of the sketch, converting sparse entries to the dense precision.'''
+        if self.__registers is not None:
+            return self.__registers
+        registers = np.zeros(self.__num_registers, dtype=np.uint8)
+        entries = np.concatenate([self.__sparse_list, np.array(self.__sparse_buffer, dtype=np.uint64)])
+        extra_bits = SPARSE_PRECISION - self.__precision
+        indices = entries >> np.uint64(SPARSE_RANK_BITS)
+        ranks = (entries & np.uint64((1 << SPARSE_RANK_BITS) - 1)).astype(np.int64)
+        # the sparse index bits past the dense index come first in the dense remainder
+        low_bits = indices & np.uint64((1 << extra_bits) - 1)
+        dense_ranks = np.where(low_bits > 0, extra_bits - _bit_length(low_bits) + 1, ranks + extra_bits)
+        np.maximum.at(registers, (indices >> np.uint64(extra_bits)).astype(np.int64), dense_ranks.astype(np.uint8))
+        return registers
+
+    def __to_dense(self):
+        '''Switches the sketch to dense registers for good.'''
+        self.__registers = self.__dense_registers()
+        self.__sparse_list = np.zeros(0, dtype=np.uint64)
+        self.__sparse_buffer = []
+        logger.debug("Switched to dense registers")
+
+    def add(self, item):
+        """Adds an item to the sketch."""
+        digest = digest64(item)
+        if self.__registers is not None:
+            remainder = digest & ((1 << (64 - self.__precision)) - 1)
+            rank = 64 - self.__precision - remainder.bit_length() + 1
+            index = digest >> (64 - self.__precision)
+            if rank > self.__registers[index]:
+                self.__registers[index] = rank
+            return
+        remainder = digest & ((1 << (64 - SPARSE_PRECISION)) - 1)
+        rank = 64 - SPARSE_PRECISION - remainder.bit_length() + 1
+        self.__sparse_buffer.append(((digest >> (64 - SPARSE_PRECISION)) << SPARSE_RANK_BITS) | rank)
+        if len(self.__sparse_buffer) >= SPARSE_BUFFER_SIZE:
+            self.__flush()
+
+    def add_many(self, items):
+        """Adds a batch of items to the sketch, hashing them in one pass."""
+        if not isinstance(items, np.ndarray):
+            items = list(items)
+        digests = digest64_batch(items)
+        if self.__registers is None:
+            remainders = digests & np.uint64((1 << (64 - SPARSE_PRECISION)) - 1)
+            ranks = (64 - SPARSE_PRECISION - _bit_length(remainders) + 1).astype(np.uint64)
+            entries = ((digests >> np.uint64(64 - SPARSE_PRECISION)) << np.uint64(SPARSE_RANK_BITS)) | ranks
+            self.__flush(entries)
+            logger.debug("Added %d items", len(digests))
+            return
+        remainders = digests & np.uint64((1 << (64 - self.__precision)) - 1)
+        ranks = (64 - self.__precision - _bit_length(remainders) + 1).astype(np.uint8)
+        np.maximum.at(self.__registers, (digests >> np.uint64(64 - self.__precision)).astype(np.int64), ranks)
+        logger.debug("Added %d items", len(digests))
+
+    def merge(self, other):
+        """Merges another HyperLogLog sketch of the same precision into this one, in place.
+        The merged sketch counts the distinct items added to either sketch.
+        """
+        if not isinstance(other, HyperLogLog) or other.get_precision() != self.__precision:
+            raise Exception("Can only merge with a HyperLogLog sketch of the same precision.")
+        if self.__registers is None and other.is_sparse():
+            self.__sparse_buffer.extend(other.__sparse_buffer)
+            self.__flush(other.__sparse_list)
+            return
+        if self.__registers is None:
+            self.__to_dense()
+        np.maximum(self.__registers, other.__dense_registers(), out=self.__registers)
+        logger.debug("Merged HyperLogLog sketch")
+
+    def count(self)->float:
+        """Estimates the number of distinct items added to the sketch.
+
+        Returns the estimated cardinality.
+        """
+        if self.__registers is not None:
+            histogram = np.bincount(self.__registers, minlength=64 - self.__precision + 2)
+            return _improved_estimate(histogram, self.__num_registers)
+        self.__flush()
+        if self.__registers is not None:
+            return self.count()
+        # sparse entries are registers of a sketch of precision 25, all others still being 0
+        num_sparse_registers = 1 << SPARSE_PRECISION
+        ranks = (self.__sparse_list & np.uint64((1 << SPARSE_RANK_BITS) - 1)).astype(np.int64)
+        histogram = np.bincount(ranks, minlength=64 - SPARSE_PRECISION + 2)
+        histogram[0] = num_sparse_registers - len(self.__sparse_list)
+        return _improved_estimate(histogram, num_sparse_registers)
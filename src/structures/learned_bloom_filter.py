@@ -0,0 +1,106 @@
+import logging
+import numpy as np
+
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import LogisticRegression
+from structures.scalable_bloom_filter import ScalableBloomFilter
+
+# Set up logging
+logger = logging.getLogger()
+logger.setLevel(logging.DEBUG)
+
+MIN_BACKUP_KEYS = 256  # smallest first layer of the backup filter; layers of a few dozen bits miss their false positive rate
+
+def to_text(item)->str:
+    """Decodes an item into the text the classifier reads: bytes are decoded as UTF-8, anything else uses its string form."""
+    if isinstance(item, bytes):
+        return item.decode("utf-8", errors="replace")
+    return str(item)
+
+class LearnedBloomFilter:
+    """
+    LearnedBloomFilter implements a learned bloom filter: a small logistic regression classifier over hashed character n-grams,
+    backed by a ScalableBloomFilter holding the keys the classifier rejects, so there are still no false negatives.
+    The classifier is trained on the keys and a sample of non-keys, and its score threshold is picked on the non-keys so that
+    the classifier alone answers a share model_share of the false positive rate. The backup filter gets the rest.
+    The backup filter starts out sized for the keys rejected at training time and adds layers as later inserts fill it,
+    so keys inserted after training never push its false positive rate past its share.
+    Only the n-gram weights and the threshold are kept, so for skewed key sets the whole filter can be much smaller than a plain bloom filter.
+    """
+
+    def __init__(self, keys, non_keys, false_positive_rate=0.01, model_share=0.5, ngram_range=(1, 3), num_features=2**12, hash_mode="seeded"):
+        '''Initialize a learned bloom filter by training on keys against a sample of non_keys, with false positive rate set to 0.01.'''
+        self.__false_positive_rate = false_positive_rate
+        self.__vectorizer = HashingVectorizer(analyzer="char_wb", ngram_range=ngram_range, n_features=num_features, alternate_sign=False)
+        keys = [to_text(key) for key in keys]
+        non_keys = [to_text(non_key) for non_key in non_keys]
+        self.__train_model(keys, non_keys, false_positive_rate * model_share)
+        self.__generate_backup_filter(keys, false_positive_rate * (1 - model_share), hash_mode)
+        logger.info("Initialized a learned bloom filter...")
+
+    def __train_model(self, keys, non_keys, model_rate):
+        '''Trains the classifier and sets the score threshold that lets through a fraction model_rate of the non-keys.'''
+        features = self.__vectorizer.transform(keys + non_keys)
+        labels = np.concatenate([np.ones(len(keys)), np.zeros(len(non_keys))])
+        model = LogisticRegression(class_weight="balanced", max_iter=1000)
+        model.fit(features, labels)
+        # only the weights are kept, in single precision
+        self.__weights = model.coef_.ravel().astype(np.float32)
+        self.__bias = float(model.intercept_[0])
+        non_key_scores = np.sort(self.__scores(non_keys))
+        # the threshold sits just above the highest non-key score that has to be rejected
+        cutoff = min(len(non_key_scores) - 1, int(np.floor(len(non_key_scores) * (1 - model_rate))))
+        self.__threshold = float(np.nextafter(non_key_scores[cutoff], np.inf))
+        logger.debug("Trained classifier with threshold %f", self.__threshold)
+
+    def __generate_backup_filter(self, keys, backup_rate, hash_mode):
+        '''Stores the keys the classifier rejects in a backup bloom filter that grows with later inserts.'''
+        rejected = [key for key, accepted in zip(keys, self.__scores(keys) >= self.__threshold) if not accepted]
+        self.__backup_filter = ScalableBloomFilter(false_positive_rate=backup_rate, key_num=max(MIN_BACKUP_KEYS, len(rejected)), hash_mode=hash_mode)
+        self.__backup_filter.insert_many(rejected)
+        logger.debug("Stored %d rejected keys in the backup filter", len(rejected))
+
+    def __scores(self, texts)->np.ndarray:
+        '''Scores a batch of texts with the classifier.'''
+        return self.__vectorizer.transform(texts) @ self.__weights + self.__bias
+
+    def get_threshold(self):
+        return self.__threshold
+
+    def get_backup_filter(self):
+        return self.__backup_filter
+
+    def insert(self, item)->bool:
+        """Inserts a given item after training. Items the classifier rejects go into the backup filter.
+
+        Returns a boolean representing successful insertion.
+        An insertion is unsuccessful if the filter thinks that this item has already been inserted.
+        """
+        text = to_text(item)
+        if self.__scores([text])[0] >= self.__threshold:
+            logger.debug("Item is accepted by the classifier")
+            return False
+        return self.__backup_filter.insert(text)
+
+    def query(self, item)->int:
+        """Checks the classifier, then the backup filter, for a given item's existence.
+
+        Returns 1 if exists, 0 otherwise.
+        """
+        text = to_text(item)
+        if self.__scores([text])[0] >= self.__threshold:
+            logger.debug("Item is found by the classifier")
+            return 1
+        return self.__backup_filter.query(text)
+
+    def query_many(self, items)->np.ndarray:
+        """Checks the existence of every item in a batch, scoring them together and sending only the rejected ones to the backup filter.
+
+        Returns a numpy boolean array that is True where the item may exist.
+        """
+        texts = [to_text(item) for item in items]
+        found = self.__scores(texts) >= self.__threshold
+        rejected = np.flatnonzero(~found)
+        if len(rejected) > 0:
+            found[rejected] = self.__backup_filter.query_many([texts[i] for i in rejected])
+        return found
@@ -0,0 +1,240 @@
+import logging
+import numpy as np
+
+from structures.hashing import digest64
+
+# Set up logging
+logger = logging.getLogger()
+logger.setLevel(logging.DEBUG)
+
+OVERFLOW_SLOTS = 64  # slots past the last quotient, so clusters near the end need no wrap-around
+
+def _remainder_type(remainder_bits: int):
+    '''Picks the narrowest unsigned numpy type holding remainders of the given size.'''
+    return np.uint8 if remainder_bits <= 8 else np.uint16 if remainder_bits <= 16 else np.uint32 if remainder_bits <= 32 else np.uint64
+
+class QuotientFilter:
+    """
+    QuotientFilter implements a quotient filter: every item gets a fingerprint of quotient_bits + remainder_bits bits,
+    whose quotient picks a home slot and whose remainder is stored in a table of 2^quotient_bits slots with linear probing.
+    The remainders of one quotient form a sorted run, runs are stored in quotient order, and three bits per slot
+    (occupied, continuation, shifted) let a lookup find the run of any quotient by scanning its cluster of neighbouring slots.
+    Deletions never fail, and once the table passes max_load it doubles by moving one remainder bit into the quotient;
+    each doubling also doubles the false positive rate, roughly load * 2^-remainder_bits.
+    A filter can double at most remainder_bits - 1 times, after which an insert that needs more room returns False.
+    """
+
+    def __init__(self, quotient_bits=16, remainder_bits=16, max_load=0.75):
+        '''Initialize a quotient filter of 2^quotient_bits slots with remainder_bits bit remainders.'''
+        if quotient_bits < 1 or remainder_bits < 1 or quotient_bits + remainder_bits > 64 or not 0 < max_load < 1:
+            raise Exception("Quotient filter configuration is invalid.")
+        self.__fingerprint_bits = quotient_bits + remainder_bits
+        self.__max_load = max_load
+        self.__count = 0
+        self.__generate_table(quotient_bits)
+        logger.info("Initialized a quotient filter with %d slots", 1 << quotient_bits)
+
+    def __generate_table(self, quotient_bits: int, extra_slots=0):
+        '''Generates an empty table of 2^quotient_bits home slots and its metadata bits.'''
+        self.__quotient_bits = quotient_bits
+        self.__remainder_bits = self.__fingerprint_bits - quotient_bits
+        num_slots = (1 << quotient_bits) + OVERFLOW_SLOTS + extra_slots
+        self.__remainders = np.zeros(num_slots, dtype=_remainder_type(self.__remainder_bits))
+        self.__occupied = np.zeros(num_slots, dtype=bool)
+        self.__continuation = np.zeros(num_slots, dtype=bool)
+        self.__shifted = np.zeros(num_slots, dtype=bool)
+
+    def get_quotient_bits(self):
+        return self.__quotient_bits
+
+    def get_remainder_bits(self):
+        return self.__remainder_bits
+
+    def __len__(self):
+        return self.__count
+
+    def load_factor(self)->float:
+        """Gets the number of stored fingerprints per home slot."""
+        return self.__count / (1 << self.__quotient_bits)
+
+    def nbytes(self)->int:
+        """Gets the number of bytes holding the table."""
+        return self.__remainders.nbytes + self.__occupied.nbytes + self.__continuation.nbytes + self.__shifted.nbytes
+
+    def __split(self, fingerprint: int):
+        '''Splits a fingerprint into its quotient and remainder.'''
+        return fingerprint >> self.__remainder_bits, fingerprint & ((1 << self.__remainder_bits) - 1)
+
+    def __fingerprint(self, item)->int:
+        '''Takes the top bits of the item's 64 bit digest as its fingerprint.'''
+        return digest64(item) >> (64 - self.__fingerprint_bits)
+
+    def __is_empty(self, slot: int)->bool:
+        return not (self.__occupied[slot] or self.__continuation[slot] or self.__shifted[slot])
+
+    def __cluster_start(self, quotient: int)->int:
+        '''Walks back from a home slot to the nearest slot holding the start of its own run.'''
+        slot = quotient
+        while self.__shifted[slot]:
+            slot -= 1
+        return slot
+
+    def __decode(self, start: int):
+        '''Reads the fingerprints stored from a cluster start up to the next empty slot.
+
+        Returns the (quotient, remainder) pairs in slot order and the first empty slot.
+        '''
+        entries = []
+        slot = start
+        quotient = start - 1
+        while slot < len(self.__remainders) and not self.__is_empty(slot):
+            if not self.__continuation[slot]:
+                # a new run belongs to the next quotient with its occupied bit set
+                quotient += 1
+                while not self.__occupied[quotient]:
+                    quotient += 1
+            entries.append((quotient, int(self.__remainders[slot])))
+            slot += 1
+        return entries, slot
+
+    def __encode(self, start: int, end: int, entries: list)->bool:
+        '''Rewrites the slots from start to end with sorted (quotient, remainder) pairs, packing every run as far left as it can go.
+
+        Returns False, without writing anything, if the pairs would run past the end of the table.
+        '''
+        slot = start
+        positions = []
+        for quotient, _ in entries:
+            slot = max(slot, quotient)
+            positions.append(slot)
+            slot += 1
+        if slot > len(self.__remainders):
+            return False
+        self.__continuation[start:end] = False
+        self.__shifted[start:end] = False
+        self.__remainders[start:end] = 0
+        previous = None
+        for (quotient, remainder), position in zip(entries, positions):
+            self.__remainders[position] = remainder
+            self.__continuation[position] = quotient == previous
+            self.__shifted[position] = position != quotient
+            previous = quotient
+        return True
+
+    def insert(self, item)->bool:
+        """Inserts an item into the quotient filter, doubling the table first if it is past its maximum load.
+
+        Returns a boolean representing successful insertion.
+        An insertion is unsuccessful if the table needs to double but its remainders are down to 1 bit.
+        """
+        if self.__count + 1 > self.__max_load * (1 << self.__quotient_bits):
+            if self.__remainder_bits <= 1:
+                logger.warning("Quotient filter is full and cannot grow past its fingerprint size")
+                return False
+            self.resize()
+        quotient, remainder = self.__split(self.__fingerprint(item))
+        if self.__is_empty(quotient):
+            self.__remainders[quotient] = remainder
+            self.__occupied[quotient] = True
+        else:
+            start = self.__cluster_start(quotient)
+            entries, end = self.__decode(start)
+            entries.append((quotient, remainder))
+            entries.sort()
+            if not self.__encode(start, end + 1, entries):
+                logger.debug("Cluster reached the end of the table")
+                if self.__remainder_bits <= 1:
+                    logger.warning("Quotient filter is full and cannot grow past its fingerprint size")
+                    return False
+                self.resize()
+                return self.insert(item)
+            self.__occupied[quotient] = True
+        self.__count += 1
+        logger.debug("Inserted item")
+        return True
+
+    def query(self, item)->int:
+        """Checks if an item might be in the filter.
+
+        Returns 1 if exists, 0 otherwise.
+        """
+        quotient, remainder = self.__split(self.__fingerprint(item))
+        if not self.__occupied[quotient]:
+            logger.debug("Item is not found")
+            return 0
+        entries, _ = self.__decode(self.__cluster_start(quotient))
+        found = (quotient, remainder) in entries
+        logger.debug("Item is %s", "found" if found else "not found")
+        return int(found)
+
+    def remove(self, item)->bool:
+        """Deletes one copy of an item from the filter, if it exists, shifting the rest of its cluster back.
+
+        Returns a boolean representing successful removal.
+        """
+        quotient, remainder = self.__split(self.__fingerprint(item))
+        if not self.__occupied[quotient]:
+            logger.debug("Item not found for removal")
+            return False
+        start = self.__cluster_start(quotient)
+        entries, end = self.__decode(start)
+        if (quotient, remainder) not in entries:
+            logger.debug("Item not found for removal")
+            return False
+        entries.remove((quotient, remainder))
+        if all(entry_quotient != quotient for entry_quotient, _ in entries):
+            self.__occupied[quotient] = False
+        self.__encode(start, end, entries)
+        self.__count -= 1
+        logger.debug("Removed item")
+        return True
+
+    def __fingerprints(self)->np.ndarray:
+        '''Reads every stored fingerprint in one sequential pass over the table.
+
+        Returns the fingerprints in sorted order.
+        '''
+        stored = np.flatnonzero(self.__occupied | self.__continuation | self.__shifted)
+        # every slot that does not continue a run starts the run of the next occupied quotient
+        run_numbers = np.cumsum(~self.__continuation[stored]) - 1
+        quotients = np.flatnonzero(self.__occupied)[run_numbers].astype(np.uint64)
+        return (quotients << np.uint64(self.__remainder_bits)) | self.__remainders[stored].astype(np.uint64)
+
+    def __load(self, fingerprints: np.ndarray):
+        '''Fills the empty table with sorted fingerprints in one pass.'''
+        quotients = (fingerprints >> np.uint64(self.__remainder_bits)).astype(np.int64)
+        order = np.arange(len(fingerprints))
+        # slot i is max(slot i - 1 + 1, quotient i), which unrolls into a running maximum
+        positions = np.maximum.accumulate(quotients - order) + order if len(fingerprints) else order
+        if len(positions) and positions[-1] >= len(self.__remainders):
+            self.__generate_table(self.__quotient_bits, positions[-1] + 1 - len(self.__remainders) + OVERFLOW_SLOTS)
+        self.__remainders[positions] = fingerprints & np.uint64((1 << self.__remainder_bits) - 1)
+        self.__occupied[quotients] = True
+        self.__continuation[positions[1:]] = quotients[1:] == quotients[:-1]
+        self.__shifted[positions] = positions != quotients
+        self.__count = len(fingerprints)
+
+    def resize(self):
+        """Doubles the number of slots by moving one bit of every remainder into its quotient, rebuilding the table in one pass."""
+        if self.__remainder_bits <= 1:
+            raise Exception("Quotient filter cannot grow past its fingerprint size.")
+        fingerprints = self.__fingerprints()
+        self.__generate_table(self.__quotient_bits + 1)
+        self.__load(fingerprints)
+        logger.info("Resized quotient filter to %d slots", 1 << self.__quotient_bits)
+
+    def merge(self, other):
+        """Combines two quotient filters with the same fingerprint size, sized to stay under the maximum load.
+
+        Returns the new quotient filter holding the items of both.
+        """
+        if not isinstance(other, QuotientFilter) or other.__fingerprint_bits != self.__fingerprint_bits:
+            raise Exception("Can only merge with a QuotientFilter of the same fingerprint size.")
+        fingerprints = np.sort(np.concatenate([self.__fingerprints(), other.__fingerprints()]))
+        quotient_bits = max(self.__quotient_bits, other.__quotient_bits)
+        while len(fingerprints) > self.__max_load * (1 << quotient_bits) and quotient_bits < self.__fingerprint_bits - 1:
+            quotient_bits += 1
+        merged = QuotientFilter(quotient_bits, self.__fingerprint_bits - quotient_bits, self.__max_load)
+        merged.__load(fingerprints)
+        logger.info("Merged quotient filters into %d slots", 1 << quotient_bits)
+        return merged
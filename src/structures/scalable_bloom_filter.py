@@ -0,0 +1,129 @@
+import logging
+import math
+import numpy as np
+
+from structures.simple_bloom_filter import BloomFilterSimple
+
+# Set up logging
+logger = logging.getLogger()
+logger.setLevel(logging.DEBUG)
+
+class ScalableBloomFilter:
+    """
+    ScalableBloomFilter implements a scalable bloom filter as a chain of simple bloom filters (layers).
+    Layer i is sized for key_num * growth^i keys with a false positive rate of false_positive_rate * (1 - tightening) * tightening^i,
+    so the rates form a geometric series and the compound false positive rate stays below false_positive_rate however many layers are added.
+    Items go into the newest layer, and a new layer is added once its fill ratio crosses the threshold.
+    By default the threshold is the fill ratio at which a layer reaches its own false positive rate.
+    """
+
+    def __init__(self, false_positive_rate=0.01, key_num=1e6, growth=2, tightening=0.8, fill_threshold=None, hash_mode="seeded"):
+        '''Initialize a scalable bloom filter whose first layer holds key_num keys, with an overall false positive rate set to 0.01.'''
+        self.__false_positive_rate = false_positive_rate
+        self.__key_num = key_num
+        self.__growth = growth
+        self.__tightening = tightening
+        self.__fill_threshold = fill_threshold
+        self.__hash_mode = hash_mode
+        self.__layers = []
+        self.__layer_thresholds = []
+        self.__add_layer()
+        logger.info("Initialized a scalable bloom filter...")
+
+    def __add_layer(self):
+        '''Appends a new layer with a larger capacity and a tighter false positive rate than the previous one.'''
+        depth = len(self.__layers)
+        layer_rate = self.__false_positive_rate * (1 - self.__tightening) * self.__tightening ** depth
+        layer_keys = self.__key_num * self.__growth ** depth
+        layer = BloomFilterSimple(false_positive_rate=layer_rate, key_num=layer_keys, hash_mode=self.__hash_mode)
+        threshold = self.__fill_threshold
+        if threshold is None:
+            # a layer with fill ratio f answers false positives with probability f^k
+            threshold = layer_rate ** (1 / max(1, layer.get_num_hashes()))
+        self.__layers.append(layer)
+        self.__layer_thresholds.append(threshold)
+        logger.debug("Added layer %d for %d keys with false positive rate %f", depth, layer_keys, layer_rate)
+
+    def __grow_if_full(self):
+        '''Adds a new layer when the newest layer's fill ratio has crossed its threshold.'''
+        if self.__layers[-1].fill_ratio() >= self.__layer_thresholds[-1]:
+            self.__add_layer()
+
+    def __layer_room(self)->int:
+        '''Estimates how many more keys fit in the newest layer before its fill ratio crosses the threshold.'''
+        layer = self.__layers[-1]
+
+        def keys_per_fill(fill):
+            # n keys fill a fraction 1 - e^(-kn/m) of the bits
+            return -layer.get_num_bits() / layer.get_num_hashes() * math.log(1 - fill)
+        return max(1, math.floor(keys_per_fill(self.__layer_thresholds[-1]) - keys_per_fill(layer.fill_ratio())))
+
+    def get_num_layers(self):
+        return len(self.__layers)
+
+    def insert(self, item)->bool:
+        """Inserts a given item to the newest layer, adding a layer first if it is full.
+
+        Returns a boolean representing successful insertion.
+        An insertion is unsuccessful if some layer thinks that this item has already been inserted.
+        """
+        for layer in self.__layers[-2::-1]:
+            if layer.query(item):
+                logger.debug("Item is already in an older layer")
+                return False
+        available = self.__layers[-1].insert(item)
+        if available:
+            self.__grow_if_full()
+        return available
+
+    def query(self, item)->int:
+        """Checks every layer, newest first, for a given item's existence.
+
+        Returns 1 if exists, 0 otherwise.
+        """
+        for layer in reversed(self.__layers):
+            if layer.query(item):
+                logger.debug("Item is found")
+                return 1
+        logger.debug("Item is not found")
+        return 0
+
+    def insert_many(self, items)->np.ndarray:
+        """Inserts a batch of items, filling the newest layer in bulk and adding layers as they fill up.
+
+        Returns a numpy boolean array that is True where the item was newly inserted.
+        """
+        if not isinstance(items, np.ndarray):
+            items = list(items)
+        available = np.zeros(len(items), dtype=bool)
+        if len(items) == 0:
+            return available
+        # items already in a layer, including repeats of items from an earlier chunk, stay where they are,
+        # and repeats inside a chunk are left to the layer's insert_many
+        start = 0
+        while start < len(items):
+            chunk = np.arange(start, min(len(items), start + self.__layer_room()))
+            chunk_items = items[chunk] if isinstance(items, np.ndarray) else [items[i] for i in chunk]
+            new = np.flatnonzero(~self.query_many(chunk_items))
+            new_items = chunk_items[new] if isinstance(chunk_items, np.ndarray) else [chunk_items[i] for i in new]
+            available[chunk[new]] = self.__layers[-1].insert_many(new_items)
+            self.__grow_if_full()
+            start += len(chunk)
+        logger.debug("Inserted %d items", len(items))
+        return available
+
+    def query_many(self, items)->np.ndarray:
+        """Checks the layers, newest first, for the existence of every item in a batch. Items found in a layer are not looked up again.
+
+        Returns a numpy boolean array that is True where the item may exist.
+        """
+        if not isinstance(items, np.ndarray):
+            items = list(items)
+        found = np.zeros(len(items), dtype=bool)
+        for layer in reversed(self.__layers):
+            remaining = np.flatnonzero(~found)
+            if len(remaining) == 0:
+                break
+            remaining_items = items[remaining] if isinstance(items, np.ndarray) else [items[i] for i in remaining]
+            found[remaining] = layer.query_many(remaining_items)
+        return found
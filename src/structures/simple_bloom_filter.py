@@ -1,25 +1,48 @@
 import logging
 import math
+import mmap
 import numpy as np
+import os
+import struct
 import sys
 
 from bitarray import bitarray
-from sklearn.utils import murmurhash3_32
+from concurrent.futures import ProcessPoolExecutor
+from structures.bit_array import bit_view, get_bits, insert_rows
+from structures.hashing import BloomHashes, DIGEST_SEEDS, HASH_MODES
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.DEBUG)
 
+# File layout: magic, version, hash mode, bit count, k, first seed, digest seeds, false positive rate, key_num,
+# zero padded to 64 bytes and followed by the raw big-endian bit payload
+FILE_MAGIC = b"BFS1"
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct("<4sHBxQIIIIdd")
+FILE_HEADER_SIZE = 64
+OPEN_MODES = {"r": mmap.ACCESS_READ, "r+": mmap.ACCESS_WRITE, "c": mmap.ACCESS_COPY}
+
+def _build_shard(false_positive_rate, key_num, hash_mode, items):
+    '''Fills a bloom filter with one shard of the input inside a worker process and returns its bit array.'''
+    shard = BloomFilterSimple(false_positive_rate=false_positive_rate, key_num=key_num, hash_mode=hash_mode)
+    shard.insert_many(items)
+    return shard.get_bit_array()
+
 class BloomFilterSimple:
     """
     Bloom_Filter_Simple implements a simple bloom filter using a bitarray of size n and k hash functions.
     By default, the false positive rate is set to 0.01, and the expected number of keys is set to 1 million.
+    The hash mode picks between k seeded hashes ("seeded") and double hashing from one 64 bit digest ("double").
     """
 
-    def __init__(self, false_positive_rate=0.01, key_num=1e6):
+    def __init__(self, false_positive_rate=0.01, key_num=1e6, hash_mode="seeded"):
         '''Initialize a simple bloom filter, with false positive rate set to 0.01 and expected number of keys set to 1 million.'''
         self.__false_positive_rate = false_positive_rate
         self.__key_num = key_num
+        self.__hash_mode = hash_mode
+        self.__mmap = None
+        self.__num_set_bits = 0
         self.__generate_bit_array()
         self.__generate_hash_functions()
         logger.info("Initialized a simple bloom filter...")
@@ -28,42 +51,15 @@ class BloomFilterSimple:
         '''Generates the bit array for the bloom filter during initialization.'''
         # round up for bit array length to favor lower false positive rate
         num_bits = math.ceil(self.__key_num * np.log(self.__false_positive_rate) / np.log(0.618))
-        self.__bit_array = bitarray(num_bits)
+        self.__bit_array = bitarray(num_bits, endian="big")
         logger.debug("Generated an array of size %d", len(self.__bit_array))
     
     def __generate_hash_functions(self):
         '''Generates a set of hash functions for the bloom filter.'''
-        
-        def hash_function_generator(size: int, limit: int)->list:
-            """
-            A function that generates a list of size hash functions.
-            The hash functions will generate any integer value in range (0, limit).
-
-            Returns a list of hash functions.
-            """
-            hash_functions = []
-
-            def hash_function(seed=1):
-                """Hash function wrapper to set the seed.
-
-                Returns a hash function with the specified seed.
-                """
-                def f(val)->int:
-                    """Wrapper for murmurhash3_32.
-
-                    Returns the hashed value.
-                    """
-                    return murmurhash3_32(val, seed, positive=True) % limit
-                return f
-            
-            for i in range(size):
-                hash_functions.append(hash_function(i))
-            return hash_functions
-        
         # Round up number of bits and round down the number of hashes to decrease false positive rate.
         num_bits = math.ceil(self.__key_num * np.log(self.__false_positive_rate) / np.log(0.618))
         num_hashes = math.floor(num_bits / self.__key_num * np.log(2))
-        self.__hash_functions = hash_function_generator(num_hashes, num_bits)
+        self.__hash_functions = BloomHashes(num_hashes, num_bits, self.__hash_mode)
         logger.debug("Generated and stored %d hash functions", len(self.__hash_functions))
 
     def insert(self, item)->bool:
@@ -73,10 +69,11 @@ class BloomFilterSimple:
         An insertion is unsuccessful if the bloom filter thinks that this item has alread been inserted.
         """
         available = False
-        for hash_function in self.__hash_functions:
-            hashed_key = hash_function(item)
+        for hashed_key in self.__hash_functions.indices(item):
             if self.__bit_array[hashed_key] == 0: # if any hashed bit is 0, we know this item has not yet been inserted
                 available = True
+                if self.__num_set_bits is not None:
+                    self.__num_set_bits += 1
             self.__bit_array[hashed_key] = 1
         logger.debug("Inserted item")
         return available
@@ -86,13 +83,235 @@ class BloomFilterSimple:
         
         Returns 1 if exists, 0 otherwise.
         """
-        for hash_function in self.__hash_functions:
-            hashed_key = hash_function(item)
+        for hashed_key in self.__hash_functions.indices(item):
             if self.__bit_array[hashed_key] == 0:
                 logger.debug("Item is not found")
                 return 0
         logger.debug("Item is found")
         return 1
+
+    def __index_matrix(self, items)->np.ndarray:
+        '''Computes the hashed slots of every item in a batch in one pass.'''
+        return self.__hash_functions.index_matrix(items)
+
+    def insert_many(self, items)->np.ndarray:
+        """Inserts a batch of items to the bloom filter. Performed by hashing the whole batch into an index matrix and flipping all of its slots in bulk.
+        The hashing itself is only batched for integer arrays or with hash_mode="double"; seeded hashing of strings still
+        calls murmurhash3_32 k times per item, so the saving there is the per-item bookkeeping and logging.
+
+        Returns a numpy boolean array holding, for each item, what insert would have returned had the items been inserted one at a time.
+        """
+        if not isinstance(items, np.ndarray):
+            items = list(items)
+        available, newly_set = insert_rows(self.__bit_array, self.__index_matrix(items))
+        if self.__num_set_bits is not None:
+            self.__num_set_bits += newly_set
+        logger.debug("Inserted %d items", len(available))
+        return available
+
+    def query_many(self, items)->np.ndarray:
+        """Checks the bloom filter for the existence of every item in a batch.
+        As with insert_many, the hashing is only batched for integer arrays or with hash_mode="double".
+
+        Returns a numpy boolean array that is True where the item may exist.
+        """
+        if not isinstance(items, np.ndarray):
+            items = list(items)
+        indices = self.__index_matrix(items)
+        logger.debug("Queried %d items", len(indices))
+        return get_bits(self.__bit_array, indices).all(axis=1)
+
+    def get_false_positive_rate(self):
+        return self.__false_positive_rate
+
+    def get_key_num(self):
+        return self.__key_num
+
+    def get_num_bits(self):
+        return self.__hash_functions.get_limit()
+
+    def get_num_hashes(self):
+        return len(self.__hash_functions)
+
+    def get_hash_mode(self):
+        return self.__hash_mode
+
+    def get_bit_array(self):
+        return self.__bit_array
+
+    def popcount(self)->int:
+        """Gets the number of bits set to 1. The count is kept up to date by every insertion, so no scan is needed.
+
+        Returns the number of set bits.
+        """
+        if self.__num_set_bits is None:
+            self.__num_set_bits = self.__bit_array.count()
+        return self.__num_set_bits
+
+    def fill_ratio(self)->float:
+        """Gets the fraction of bits set to 1.
+
+        Returns the fill ratio.
+        """
+        return self.popcount() / self.get_num_bits()
+
+    def estimated_cardinality(self)->float:
+        """Estimates the number of distinct items inserted with the Swamidass-Baldi estimator, -(m/k) * ln(1 - X/m) for X set bits out of m.
+
+        Returns the estimated number of distinct items, infinite once every bit is set.
+        """
+        if self.popcount() >= self.get_num_bits():
+            return math.inf
+        return -self.get_num_bits() / self.get_num_hashes() * math.log(1 - self.fill_ratio())
+
+    def current_false_positive_rate(self)->float:
+        """Predicts the false positive rate of the filter in its current state, the chance that all k slots of a new item are set.
+        Once this goes past the configured false positive rate, the filter is past its design point and should be resized.
+
+        Returns the predicted false positive rate.
+        """
+        return self.fill_ratio() ** self.get_num_hashes()
+
+    def __check_compatible(self, other):
+        '''Makes sure another bloom filter hashes items to the same slots as this one.'''
+        if not isinstance(other, BloomFilterSimple):
+            raise Exception("Can only combine with another BloomFilterSimple.")
+        if (self.get_num_bits(), self.get_num_hashes(), self.__hash_mode) != (other.get_num_bits(), other.get_num_hashes(), other.get_hash_mode()):
+            raise Exception("Bloom filters have different parameters.")
+
+    def __combined(self, other, operation):
+        '''Builds a new bloom filter whose bytes are operation applied to the bytes of self and other.'''
+        self.__check_compatible(other)
+        combined = BloomFilterSimple(false_positive_rate=self.__false_positive_rate, key_num=self.__key_num, hash_mode=self.__hash_mode)
+        # memory mapped bit arrays are padded to whole bytes, so only the bytes holding real bits are combined
+        num_bytes = len(bit_view(combined.__bit_array))
+        operation(bit_view(self.__bit_array)[:num_bytes], bit_view(other.get_bit_array())[:num_bytes], out=bit_view(combined.__bit_array))
+        combined.__num_set_bits = None
+        return combined
+
+    def union(self, other):
+        """Combines two bloom filters with the same parameters into one holding the items of both.
+
+        Returns the new bloom filter.
+        """
+        return self.__combined(other, np.bitwise_or)
+
+    def intersection(self, other):
+        """Combines two bloom filters with the same parameters into one holding (a superset of) the items they share.
+
+        Returns the new bloom filter.
+        """
+        return self.__combined(other, np.bitwise_and)
+
+    def merge_from(self, other):
+        """Adds the items of another bloom filter with the same parameters into this one, in place."""
+        self.__check_compatible(other)
+        num_bytes = math.ceil(self.get_num_bits() / 8)
+        own_bytes = bit_view(self.__bit_array)[:num_bytes]
+        np.bitwise_or(own_bytes, bit_view(other.get_bit_array())[:num_bytes], out=own_bytes)
+        self.__num_set_bits = None
+        logger.debug("Merged bloom filter")
+
+    @classmethod
+    def build_parallel(cls, items, false_positive_rate=0.01, key_num=1e6, hash_mode="seeded", num_workers=None):
+        """Builds a bloom filter from a large input using every core.
+        The input is split into one shard per worker, each worker fills its own bloom filter with insert_many,
+        and the resulting bit arrays are OR-ed together.
+
+        Returns the filled bloom filter.
+        """
+        if not isinstance(items, np.ndarray):
+            items = list(items)
+        bloom_filter = cls(false_positive_rate=false_positive_rate, key_num=key_num, hash_mode=hash_mode)
+        num_shards = num_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=num_shards) as executor:
+            bounds = np.linspace(0, len(items), num_shards + 1).astype(int)
+            shards = [items[bounds[i]:bounds[i + 1]] for i in range(num_shards)]
+            for bits in executor.map(_build_shard, [false_positive_rate] * num_shards, [key_num] * num_shards, [hash_mode] * num_shards, shards):
+                own_bytes = bit_view(bloom_filter.__bit_array)
+                np.bitwise_or(own_bytes, bit_view(bits), out=own_bytes)
+        bloom_filter.__num_set_bits = None
+        logger.info("Built bloom filter from %d items with %d workers", len(items), num_shards)
+        return bloom_filter
+
+    @classmethod
+    def from_set_bits(cls, set_bits: np.ndarray, false_positive_rate=0.01, key_num=1e6, hash_mode="seeded"):
+        """Builds a bloom filter whose bit i is set wherever set_bits[i] is true,
+        for bit arrays laid out by another filter with the same parameters, such as a counting bloom filter.
+
+        Returns the new bloom filter.
+        """
+        bloom_filter = cls(false_positive_rate=false_positive_rate, key_num=key_num, hash_mode=hash_mode)
+        if len(set_bits) != bloom_filter.get_num_bits():
+            raise Exception("Bit count does not match the bloom filter parameters.")
+        bit_view(bloom_filter.__bit_array)[:] = np.packbits(set_bits)
+        bloom_filter.__num_set_bits = None
+        return bloom_filter
+
+    def save(self, path):
+        """Writes the bloom filter to a file: a 64 byte header holding its parameters, followed by the raw bit array."""
+        header = FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, HASH_MODES.index(self.__hash_mode), self.__hash_functions.get_limit(),
+                                  len(self.__hash_functions), 0, DIGEST_SEEDS[0], DIGEST_SEEDS[1],
+                                  self.__false_positive_rate, self.__key_num)
+        with open(path, "wb") as file:
+            file.write(header.ljust(FILE_HEADER_SIZE, b"\0"))
+            self.__bit_array.tofile(file)
+        logger.info("Saved bloom filter to %s", path)
+
+    @classmethod
+    def open(cls, path, mode="r"):
+        """Opens a bloom filter written by save without copying its bit array.
+        The payload is memory mapped, so pages are loaded on demand and shared with every other process mapping the file.
+        Mode "r" maps the filter read-only, "r+" writes insertions through to the file, and "c" keeps insertions private (copy-on-write).
+
+        Returns the memory mapped bloom filter.
+        """
+        if mode not in OPEN_MODES:
+            raise Exception("Open mode is invalid.")
+        with open(path, "r+b" if mode == "r+" else "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=OPEN_MODES[mode])
+        magic, version, hash_mode, num_bits, num_hashes, seed_base, digest_seed_0, digest_seed_1, false_positive_rate, key_num = FILE_HEADER.unpack_from(mapped)
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            mapped.close()
+            raise Exception("File is not a saved bloom filter.")
+        if seed_base != 0 or (digest_seed_0, digest_seed_1) != DIGEST_SEEDS:
+            mapped.close()
+            raise Exception("Saved bloom filter uses incompatible hash seeds.")
+
+        bloom_filter = cls.__new__(cls)
+        bloom_filter.__false_positive_rate = false_positive_rate
+        bloom_filter.__key_num = key_num
+        bloom_filter.__hash_mode = HASH_MODES[hash_mode]
+        bloom_filter.__hash_functions = BloomHashes(num_hashes, num_bits, bloom_filter.__hash_mode)
+        # counting the set bits would read every page, so it is deferred to the first fill_ratio call
+        bloom_filter.__num_set_bits = None
+        # the bitarray imports the mapped pages, so its length is rounded up to whole bytes; hashes never reach the padding
+        payload = memoryview(mapped)[FILE_HEADER_SIZE:FILE_HEADER_SIZE + math.ceil(num_bits / 8)]
+        bloom_filter.__bit_array = bitarray(buffer=payload, endian="big")
+        bloom_filter.__mmap = mapped
+        bloom_filter.__mmap_mode = mode
+        logger.info("Opened bloom filter of %d bits from %s", num_bits, path)
+        return bloom_filter
+
+    def close(self):
+        """Releases the memory mapping of a bloom filter returned by open, flushing insertions made in "r+" mode.
+        Bit arrays returned by get_bit_array share the mapped pages, so they must be released first;
+        otherwise close raises and the filter stays open and usable.
+        """
+        if self.__mmap is None:
+            return
+        if self.__mmap_mode == "r+":
+            self.__mmap.flush()
+        num_bytes = len(self.__bit_array) // 8
+        self.__bit_array = bitarray(0, endian="big")
+        try:
+            self.__mmap.close()
+        except BufferError:
+            # the mapping is still intact, so the bit array is imported from it again
+            payload = memoryview(self.__mmap)[FILE_HEADER_SIZE:FILE_HEADER_SIZE + num_bytes]
+            self.__bit_array = bitarray(buffer=payload, endian="big")
+            raise Exception("Bloom filter is still in use, release the bit arrays from get_bit_array before closing.")
+        self.__mmap = None
     
     # def size(self)->int:
     #     """Gets the size of the bloom filter. 
@@ -0,0 +1,117 @@
+import heapq
+import itertools
+import logging
+
+# Set up logging
+logger = logging.getLogger()
+logger.setLevel(logging.DEBUG)
+
+class SpaceSaving:
+    """
+    SpaceSaving implements the SpaceSaving heavy hitter algorithm, tracking at most capacity items with their counts.
+    When a new item arrives and every slot is taken, the item with the smallest count is evicted and the new item
+    takes over its count, which is remembered as the error of the new item.
+    Every item whose true frequency is above total / capacity is guaranteed to be tracked, and a tracked count
+    overestimates the true frequency by at most its error.
+    The smallest count is found through a heap with lazy deletion, rebuilt whenever stale entries pile up.
+    """
+
+    def __init__(self, capacity=100):
+        '''Initialize a SpaceSaving tracker holding up to capacity items, set to 100.'''
+        if capacity < 1:
+            raise Exception("Capacity is invalid.")
+        self.__capacity = capacity
+        self.__counts = {}
+        self.__errors = {}
+        self.__heap = []
+        self.__sequence = itertools.count()  # breaks ties between equal counts so items are never compared
+        self.__total = 0
+        logger.info("Initialized a SpaceSaving tracker of capacity %d", capacity)
+
+    def __len__(self):
+        return len(self.__counts)
+
+    def get_capacity(self):
+        return self.__capacity
+
+    def get_total(self):
+        return self.__total
+
+    def __pop_min(self):
+        '''Removes the tracked item with the smallest count, skipping heap entries that are out of date.
+
+        Returns the item and its count.
+        '''
+        while True:
+            count, _, item = heapq.heappop(self.__heap)
+            if self.__counts.get(item) == count:
+                del self.__counts[item]
+                del self.__errors[item]
+                return item, count
+
+    def __push(self, item, count):
+        '''Records the new count of an item in the heap, rebuilding it once it holds too many stale entries.'''
+        if len(self.__heap) > 4 * self.__capacity:
+            self.__heap = [(tracked_count, next(self.__sequence), tracked) for tracked, tracked_count in self.__counts.items()]
+            heapq.heapify(self.__heap)
+        else:
+            heapq.heappush(self.__heap, (count, next(self.__sequence), item))
+
+    def add(self, item, count=1)->int:
+        """Adds count occurrences of an item, evicting the smallest tracked item if the tracker is full.
+
+        Returns the tracked count of the item after the addition.
+        """
+        if count < 0:
+            raise Exception("Count is invalid.")
+        self.__total += count
+        if item in self.__counts:
+            self.__counts[item] += count
+        elif len(self.__counts) < self.__capacity:
+            self.__counts[item] = count
+            self.__errors[item] = 0
+        else:
+            _, min_count = self.__pop_min()
+            logger.debug("Evicted item with count %d", min_count)
+            self.__counts[item] = min_count + count
+            self.__errors[item] = min_count
+        self.__push(item, self.__counts[item])
+        return self.__counts[item]
+
+    def add_many(self, items, counts=None):
+        """Adds a batch of items, each once or counts[i] times.
+        Repeated items are summed first, so each distinct item of the batch is added once with its total count.
+        """
+        totals = {}
+        if counts is None:
+            for item in items:
+                totals[item] = totals.get(item, 0) + 1
+        else:
+            for item, count in zip(items, counts):
+                totals[item] = totals.get(item, 0) + int(count)
+        for item, count in totals.items():
+            self.add(item, count)
+
+    def estimate(self, item)->int:
+        """Gets the tracked count of an item.
+
+        Returns the count, an upper bound of the true frequency, or 0 if the item is not tracked.
+        """
+        return self.__counts.get(item, 0)
+
+    def get_error(self, item)->int:
+        """Gets how much the tracked count of an item may overestimate its true frequency.
+
+        Returns the error, or 0 if the item is not tracked.
+        """
+        return self.__errors.get(item, 0)
+
+    def top(self, k=None)->list:
+        """Lists the k most frequent tracked items, or all of them.
+
+        Returns a list of (item, count, error) tuples sorted by decreasing count.
+        """
+        ranked = sorted(self.__counts.items(), key=lambda entry: entry[1], reverse=True)
+        if k is not None:
+            ranked = ranked[:k]
+        return [(item, count, self.__errors[item]) for item, count in ranked]
@@ -0,0 +1,125 @@
+import logging
+import math
+import numpy as np
+
+from bitarray import bitarray
+from structures.bit_array import insert_rows
+from structures.hashing import BloomHashes
+
+# Set up logging
+logger = logging.getLogger()
+logger.setLevel(logging.DEBUG)
+
+# Markers keeping prefix nodes and whole keys apart in the shared bit array
+PREFIX_MARKER = b"\x00"
+KEY_MARKER = b"\x01"
+
+def to_bytes(item)->bytes:
+    """Encodes an item as bytes: bytes stay as they are, anything else is encoded from its string form."""
+    if isinstance(item, bytes):
+        return item
+    return str(item).encode()
+
+class TrieBloomFilter:
+    """
+    TrieBloomFilter implements a trie-based bloom filter, storing the nodes of a trie over the keys in one bitarray.
+    Inserting a key sets the bits of the key itself and of every one of its prefixes (the nodes on its trie path),
+    so query_prefix can tell whether any stored key might start with a prefix by probing a few hashed bits instead of scanning keys.
+    Prefixes are taken over the UTF-8 bytes of a key, and max_prefix_length caps how deep the trie goes.
+    The bit array is sized for key_num keys with avg_key_length nodes each, an upper bound since real keys share prefixes.
+    """
+
+    def __init__(self, false_positive_rate=0.01, key_num=1e6, avg_key_length=8, max_prefix_length=None, hash_mode="seeded"):
+        '''Initialize a trie-based bloom filter, with false positive rate set to 0.01 and expected number of keys set to 1 million.'''
+        self.__false_positive_rate = false_positive_rate
+        self.__key_num = key_num
+        self.__max_prefix_length = max_prefix_length
+        nodes_per_key = avg_key_length if max_prefix_length is None else min(avg_key_length, max_prefix_length)
+        self.__node_num = key_num * (1 + nodes_per_key)
+        self.__hash_mode = hash_mode
+        self.__generate_bit_array()
+        self.__generate_hash_functions()
+        logger.info("Initialized a trie-based bloom filter...")
+
+    def __generate_bit_array(self):
+        '''Generates the bit array for the trie-based bloom filter during initialization.'''
+        num_bits = math.ceil(self.__node_num * np.log(self.__false_positive_rate) / np.log(0.618))
+        self.__bit_array = bitarray(num_bits, endian="big")
+        logger.debug("Generated an array of size %d", len(self.__bit_array))
+
+    def __generate_hash_functions(self):
+        '''Generates a set of hash functions for the trie-based bloom filter.'''
+        num_bits = len(self.__bit_array)
+        num_hashes = math.floor(num_bits / self.__node_num * np.log(2))
+        self.__hash_functions = BloomHashes(num_hashes, num_bits, self.__hash_mode)
+        logger.debug("Generated and stored %d hash functions", len(self.__hash_functions))
+
+    def __nodes(self, key: bytes)->list:
+        '''Lists the hashed node keys of a key: every prefix on its trie path and the key itself.'''
+        depth = len(key) if self.__max_prefix_length is None else min(len(key), self.__max_prefix_length)
+        return [PREFIX_MARKER + key[:length] for length in range(1, depth + 1)] + [KEY_MARKER + key]
+
+    def __contains(self, node: bytes)->bool:
+        '''Checks whether all the hashed bits of a node are set.'''
+        for hashed_key in self.__hash_functions.indices(node):
+            if self.__bit_array[hashed_key] == 0:
+                return False
+        return True
+
+    def insert(self, item)->bool:
+        """Inserts a given item and all of its prefixes to the trie-based bloom filter.
+
+        Returns a boolean representing successful insertion.
+        An insertion is unsuccessful if the bloom filter thinks that this item has already been inserted.
+        """
+        available = False
+        for node in self.__nodes(to_bytes(item)):
+            for hashed_key in self.__hash_functions.indices(node):
+                if self.__bit_array[hashed_key] == 0 and node[:1] == KEY_MARKER:
+                    available = True
+                self.__bit_array[hashed_key] = 1
+        logger.debug("Inserted item")
+        return available
+
+    def insert_many(self, items)->np.ndarray:
+        """Inserts a batch of items and all of their prefixes to the trie-based bloom filter in bulk.
+
+        Returns a numpy boolean array holding, for each item, what insert would have returned had the items been inserted one at a time.
+        """
+        nodes = []
+        key_rows = []
+        for item in items:
+            nodes.extend(self.__nodes(to_bytes(item)))
+            key_rows.append(len(nodes) - 1)
+        available, _ = insert_rows(self.__bit_array, self.__hash_functions.index_matrix(nodes))
+        logger.debug("Inserted %d trie nodes", len(nodes))
+        return available[key_rows]
+
+    def query(self, item)->int:
+        """Checks the trie-based bloom filter for a given item's existence.
+
+        Returns 1 if exists, 0 otherwise.
+        """
+        if self.__contains(KEY_MARKER + to_bytes(item)):
+            logger.debug("Item is found")
+            return 1
+        logger.debug("Item is not found")
+        return 0
+
+    def query_prefix(self, prefix)->int:
+        """Checks whether any stored item might start with a given prefix.
+        The trie path is walked from the shortest prefix down, so most misses stop after a few probes near the root
+        and a false positive needs every node on the path to collide. Prefixes longer than max_prefix_length are cut to it.
+
+        Returns 1 if some item might start with the prefix, 0 otherwise.
+        """
+        prefix = to_bytes(prefix)
+        depth = len(prefix) if self.__max_prefix_length is None else min(len(prefix), self.__max_prefix_length)
+        if depth == 0:
+            return int(self.__bit_array.any())
+        for length in range(1, depth + 1):
+            if not self.__contains(PREFIX_MARKER + prefix[:length]):
+                logger.debug("Prefix is not found")
+                return 0
+        logger.debug("Prefix is found")
+        return 1
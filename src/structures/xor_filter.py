@@ -0,0 +1,134 @@
+import logging
+import math
+import numpy as np
+
+from structures.hashing import MASK64, digest64, digest64_batch, mix64, mix64_batch
+
+# Set up logging
+logger = logging.getLogger()
+logger.setLevel(logging.DEBUG)
+
+FINGERPRINT_TYPES = {8: np.uint8, 16: np.uint16}
+MAX_BUILD_ATTEMPTS = 100
+
+class XorFilter:
+    """
+    XorFilter implements a static xor filter over a fixed set of keys, with 8 or 16 bit fingerprints.
+    The filter is an array of about 1.23 fingerprints per key in three equal blocks, and every key hashes to one slot per block.
+    Construction finds an assignment where the three slots of every key xor to the key's fingerprint,
+    so a query is exactly three lookups, and a missing key matches with chance 2^-fingerprint_bits.
+    Keys cannot be added or removed after construction; rebuild the filter from the new key set instead.
+    """
+
+    def __init__(self, keys, fingerprint_bits=8):
+        '''Initialize an xor filter holding keys, with 8 bit fingerprints for a false positive rate of about 0.4%.'''
+        if fingerprint_bits not in FINGERPRINT_TYPES:
+            raise Exception("Fingerprint size is invalid.")
+        self.__fingerprint_bits = fingerprint_bits
+        if not isinstance(keys, np.ndarray):
+            keys = list(keys)
+        # equal keys would share all three slots and could never be peeled apart
+        digests = np.unique(digest64_batch(keys))
+        self.__num_keys = len(digests)
+        self.__block_length = (32 + math.ceil(1.23 * self.__num_keys)) // 3
+        for seed in range(MAX_BUILD_ATTEMPTS):
+            fingerprints = self.__construct(digests, seed)
+            if fingerprints is not None:
+                self.__seed = seed
+                self.__fingerprints = fingerprints
+                logger.info("Built an xor filter of %d keys with seed %d", self.__num_keys, seed)
+                return
+            logger.debug("Construction failed with seed %d", seed)
+        raise Exception("Could not build the xor filter.")
+
+    def get_fingerprint_bits(self):
+        return self.__fingerprint_bits
+
+    def get_num_slots(self):
+        return len(self.__fingerprints)
+
+    def get_seed(self):
+        return self.__seed
+
+    def __len__(self):
+        return self.__num_keys
+
+    def nbytes(self)->int:
+        """Gets the number of bytes holding the fingerprints."""
+        return self.__fingerprints.nbytes
+
+    def __slots(self, hashed: np.ndarray)->np.ndarray:
+        '''Maps mixed hashes to their slot in each of the three blocks, one row per hash.'''
+        slots = np.empty((len(hashed), 3), dtype=np.int64)
+        for block in range(3):
+            rotated = (hashed << np.uint64(21 * block)) | (hashed >> np.uint64(64 - 21 * block)) if block else hashed
+            # multiply-shift maps the low 32 bits onto the block without a modulo
+            slots[:, block] = ((rotated & np.uint64(0xFFFFFFFF)) * np.uint64(self.__block_length)) >> np.uint64(32)
+            slots[:, block] += block * self.__block_length
+        return slots
+
+    def __fingerprint(self, hashed):
+        '''Takes the fingerprint of mixed hashes from their bits folded together.'''
+        return (hashed ^ (hashed >> np.uint64(32))) & np.uint64((1 << self.__fingerprint_bits) - 1)
+
+    def __construct(self, digests: np.ndarray, seed: int):
+        '''Peels the 3-hypergraph of the keys one round at a time, then assigns fingerprints in reverse peeling order.
+
+        Returns the fingerprint array, or None if the graph could not be fully peeled with this seed.
+        '''
+        hashed = mix64_batch(digests, seed)
+        slots = self.__slots(hashed)
+        num_slots = 3 * self.__block_length
+        key_ids = np.arange(len(digests), dtype=np.int64)
+        counts = np.bincount(slots.ravel(), minlength=num_slots)
+        # the xor of the ids of the keys in a slot is the id of the key itself once only one is left
+        xor_ids = np.zeros(num_slots, dtype=np.int64)
+        np.bitwise_xor.at(xor_ids, slots.ravel(), np.repeat(key_ids, 3))
+        rounds = []
+        num_peeled = 0
+        singles = np.flatnonzero(counts == 1)
+        while len(singles) > 0:
+            # a key alone in two slots is peeled once, from the first of them
+            keys, first = np.unique(xor_ids[singles], return_index=True)
+            rounds.append((keys, singles[first]))
+            num_peeled += len(keys)
+            touched = slots[keys].ravel()
+            np.subtract.at(counts, touched, 1)
+            np.bitwise_xor.at(xor_ids, touched, np.repeat(keys, 3))
+            singles = np.unique(touched[counts[touched] == 1])
+        if num_peeled < len(digests):
+            return None
+        fingerprints = np.zeros(num_slots, dtype=np.uint64)
+        key_fingerprints = self.__fingerprint(hashed)
+        # keys peeled in the same round never share a slot, so each round is assigned in one step
+        for keys, peeled_slots in reversed(rounds):
+            key_slots = slots[keys]
+            fingerprints[peeled_slots] = key_fingerprints[keys] ^ fingerprints[key_slots[:, 0]] ^ fingerprints[key_slots[:, 1]] ^ fingerprints[key_slots[:, 2]]
+        return fingerprints.astype(FINGERPRINT_TYPES[self.__fingerprint_bits])
+
+    def query(self, item)->int:
+        """Checks the xor filter for a given item's existence with three lookups.
+
+        Returns 1 if exists, 0 otherwise.
+        """
+        hashed = mix64(digest64(item), self.__seed)
+        fingerprint = (hashed ^ (hashed >> 32)) & ((1 << self.__fingerprint_bits) - 1)
+        found = fingerprint
+        for block in range(3):
+            rotated = ((hashed << (21 * block)) | (hashed >> (64 - 21 * block))) & MASK64 if block else hashed
+            found ^= int(self.__fingerprints[(((rotated & 0xFFFFFFFF) * self.__block_length) >> 32) + block * self.__block_length])
+        return int(found == 0)
+
+    def query_many(self, items)->np.ndarray:
+        """Checks the existence of every item in a batch.
+
+        Returns a numpy boolean array that is True where the item may exist.
+        """
+        if not isinstance(items, np.ndarray):
+            items = list(items)
+        hashed = mix64_batch(digest64_batch(items), self.__seed)
+        slots = self.__slots(hashed)
+        found = self.__fingerprint(hashed).astype(self.__fingerprints.dtype)
+        for block in range(3):
+            found ^= self.__fingerprints[slots[:, block]]
+        return found == 0
@@ -0,0 +1,57 @@
+import unittest
+import os
+import sys
+
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.append(src_path)
+from structures.aging_bloom_filter import AgingBloomFilter
+
+class TestAgingBloomFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.bloom_filter = AgingBloomFilter(false_positive_rate=0.01, key_num=5000, generations=3)
+
+    def test_insert_one(self):
+        '''Test inserting a number'''
+        self.assertTrue(self.bloom_filter.insert(1))
+        self.assertFalse(self.bloom_filter.insert(1))
+        self.assertEqual(1, self.bloom_filter.query(1))
+
+    def test_advance(self):
+        '''Test items are forgotten once their generation is rotated out'''
+        self.bloom_filter.insert_many([str(val) for val in range(5000)])
+        self.bloom_filter.advance()
+        self.bloom_filter.advance()
+        self.assertTrue(self.bloom_filter.query_many([str(val) for val in range(5000)]).all())
+        self.bloom_filter.advance()
+        self.assertLess(self.bloom_filter.query_many([str(val) for val in range(5000)]).mean(), 0.01)
+
+    def test_refresh(self):
+        '''Test inserting a remembered item moves it to the current generation'''
+        self.assertTrue(self.bloom_filter.insert("name"))
+        self.bloom_filter.advance()
+        self.bloom_filter.advance()
+        self.assertFalse(self.bloom_filter.insert("name"))
+        self.bloom_filter.advance()
+        self.assertEqual(1, self.bloom_filter.query("name"))
+
+    def test_stream(self):
+        '''Test the false positive rate stays bounded on a long stream'''
+        for generation in range(10):
+            values = [str(val) for val in range(generation * 5000, (generation + 1) * 5000)]
+            results = self.bloom_filter.insert_many(values)
+            self.assertGreater(results.mean(), 0.98)
+            self.assertEqual([self.bloom_filter.query(val) for val in values[:100]], [1] * 100)
+            self.bloom_filter.advance()
+        false_positives = self.bloom_filter.query_many([str(val) for val in range(100000, 120000)])
+        self.assertLess(false_positives.mean(), 0.01)
+
+    def test_time_based_rotation(self):
+        '''Test generations rotate on their own once the interval passes'''
+        now = [0.0]
+        bloom_filter = AgingBloomFilter(false_positive_rate=0.01, key_num=1000, generations=2, generation_interval=60, clock=lambda: now[0])
+        bloom_filter.insert("name")
+        now[0] = 90
+        self.assertEqual(1, bloom_filter.query("name"))
+        now[0] = 121
+        self.assertEqual(0, bloom_filter.query("name"))
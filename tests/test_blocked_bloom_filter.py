@@ -0,0 +1,53 @@
+import numpy as np
+import unittest
+import os
+import sys
+
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.append(src_path)
+from structures.blocked_bloom_filter import BlockedBloomFilter, blocked_false_positive_rate, BLOCK_BITS
+
+class TestBlockedBloomFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.bloom_filter = BlockedBloomFilter(false_positive_rate=0.01, key_num=20000)
+
+    def test_insert_one(self):
+        '''Test inserting a number'''
+        self.assertTrue(self.bloom_filter.insert(1))
+        self.assertFalse(self.bloom_filter.insert(1))
+        self.assertEqual(1, self.bloom_filter.query(1))
+
+    def test_insert_multi(self):
+        '''Test multiple insertions and the false positive rate'''
+        np.random.seed(123)
+        insert_values = [str(val).encode() for val in np.random.choice(range(1, 1000000), size=20000, replace=False)]
+        for val in insert_values:
+            self.bloom_filter.insert(val)
+        for val in insert_values:
+            self.assertEqual(1, self.bloom_filter.query(val))
+        false_positives = sum(self.bloom_filter.query(str(val).encode()) for val in range(1000000, 1050000))
+        self.assertLess(false_positives / 50000, 0.012)
+
+    def test_insert_many(self):
+        '''Test batch operations agree with single operations'''
+        insert_values = [str(val) for val in range(5000)]
+        sequential = BlockedBloomFilter(false_positive_rate=0.1, key_num=500)
+        expected = [sequential.insert(val) for val in insert_values + insert_values[:10]]
+        batch = BlockedBloomFilter(false_positive_rate=0.1, key_num=500)
+        self.assertEqual(expected, batch.insert_many(insert_values + insert_values[:10]).tolist())
+        test_values = [str(val) for val in range(5000, 6000)]
+        self.assertEqual([sequential.query(val) == 1 for val in test_values], batch.query_many(test_values).tolist())
+
+    def test_sizing(self):
+        '''Test the bit array is grown to meet the target rate after blocking'''
+        num_bits = self.bloom_filter.get_num_blocks() * BLOCK_BITS
+        self.assertLessEqual(blocked_false_positive_rate(num_bits, 20000, self.bloom_filter.get_num_hashes()), 0.01)
+        self.assertGreater(num_bits, 20000 * np.log(0.01) / np.log(0.618))
+
+    def test_false_positive_rate(self):
+        '''Test the measured false positive rate meets a tight target, not only the sizing model'''
+        bloom_filter = BlockedBloomFilter(false_positive_rate=0.0001, key_num=103600)
+        bloom_filter.insert_many([f"key{val}" for val in range(103600)])
+        false_positives = bloom_filter.query_many([f"other{val}" for val in range(1000000)]).sum()
+        self.assertLess(false_positives / 1000000, 0.00015)
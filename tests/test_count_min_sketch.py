@@ -0,0 +1,56 @@
+import numpy as np
+import unittest
+import os
+import sys
+
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.append(src_path)
+from structures.count_min_sketch import CountMinSketch
+
+class TestCountMinSketch(unittest.TestCase):
+
+    def setUp(self):
+        # a skewed stream: item i appears about 5000 / i times
+        generator = np.random.default_rng(7)
+        self.stream = generator.zipf(1.3, size=50000)
+        self.stream = self.stream[self.stream < 100000]
+        self.values, self.frequencies = np.unique(self.stream, return_counts=True)
+
+    def test_estimates(self):
+        '''Test estimates never undercount and stay within the error bound'''
+        for conservative in [False, True]:
+            sketch = CountMinSketch(epsilon=0.001, delta=0.01, conservative=conservative)
+            for val in self.stream[:5000]:
+                sketch.add(int(val))
+            sketch.add_many(self.stream[5000:])
+            self.assertEqual(len(self.stream), sketch.get_total())
+            estimates = sketch.estimate_many(self.values)
+            self.assertTrue((estimates >= self.frequencies).all())
+            self.assertLess(np.mean(estimates - self.frequencies > 0.001 * len(self.stream)), 0.01)
+            self.assertEqual([sketch.estimate(int(val)) for val in self.values[:100]], estimates[:100].tolist())
+
+    def test_conservative_update(self):
+        '''Test conservative update overestimates no more than plain update'''
+        plain = CountMinSketch(epsilon=0.01, delta=0.01)
+        conservative = CountMinSketch(epsilon=0.01, delta=0.01, conservative=True)
+        plain.add_many(self.stream)
+        for val in self.stream:
+            conservative.add(int(val))
+        plain_error = (plain.estimate_many(self.values) - self.frequencies).sum()
+        conservative_error = (conservative.estimate_many(self.values) - self.frequencies).sum()
+        self.assertTrue((conservative.estimate_many(self.values) >= self.frequencies).all())
+        self.assertLess(conservative_error, plain_error)
+
+    def test_weighted_add(self):
+        '''Test weighted additions match repeated additions'''
+        weighted = CountMinSketch(epsilon=0.01, delta=0.01)
+        repeated = CountMinSketch(epsilon=0.01, delta=0.01)
+        self.assertEqual(7, weighted.add("Mary", 7))
+        weighted.add_many(["John", "Anna", "John"], [3, 2, 4])
+        repeated.add_many(["Mary"] * 7 + ["John"] * 7 + ["Anna"] * 2)
+        for name in ["Mary", "John", "Anna", "Emma"]:
+            self.assertEqual(repeated.estimate(name), weighted.estimate(name))
+        self.assertEqual(7, weighted.estimate("John"))
+        self.assertEqual(16, weighted.get_total())
+        with self.assertRaises(Exception):
+            weighted.add("Mary", -1)
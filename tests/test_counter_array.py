@@ -0,0 +1,83 @@
+import numpy as np
+import unittest
+import os
+import sys
+
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.append(src_path)
+from structures.counter_array import CounterArray
+
+class TestCounterArray(unittest.TestCase):
+
+    def test_packing(self):
+        '''Test neighbouring 4 bit counters do not disturb each other'''
+        counters = CounterArray(11, counter_bits=4)
+        self.assertEqual(6, counters.nbytes())
+        for _ in range(3):
+            counters.increment(4)
+        counters.increment(5)
+        counters.increment(10)
+        self.assertEqual([0, 0, 0, 0, 3, 1, 0, 0, 0, 0, 1], counters.values().tolist())
+        self.assertEqual(3, counters.decrement(4))
+        self.assertEqual(2, counters.get(4))
+        self.assertEqual(1, counters.get(5))
+
+    def test_saturation(self):
+        '''Test counters saturate at their maximum and stay there'''
+        for counter_bits, max_value in [(4, 15), (8, 255)]:
+            counters = CounterArray(4, counter_bits=counter_bits)
+            for _ in range(max_value + 3):
+                counters.increment(1)
+            self.assertEqual(max_value, counters.get(1))
+            self.assertEqual(3, counters.get_saturation_count())
+            counters.decrement(1)
+            self.assertEqual(max_value, counters.get(1))
+            self.assertEqual(0, counters.get(0))
+
+    def test_set_values(self):
+        '''Test whole-array writes round trip and saturate'''
+        for counter_bits in [4, 8, 64]:
+            counters = CounterArray(7, counter_bits=counter_bits)
+            values = np.array([0, 1, 2, 3, 14, 15, 9])
+            counters.set_values(values)
+            self.assertEqual(values.tolist(), counters.values().tolist())
+        counters = CounterArray(3, counter_bits=4)
+        counters.set_values([20, 15, 1])
+        self.assertEqual([15, 15, 1], counters.values().tolist())
+        self.assertEqual(5, counters.get_saturation_count())
+
+    def test_invalid_width(self):
+        '''Test an unsupported counter width is rejected'''
+        with self.assertRaises(Exception):
+            CounterArray(10, counter_bits=16)
+
+    def test_weighted_and_raise(self):
+        '''Test weighted batch additions and raising counters saturate like single increments'''
+        counters = CounterArray(6, counter_bits=4)
+        self.assertEqual(2, counters.add_many(np.array([1, 3, 1]), np.array([4, 20, 5])))
+        self.assertEqual([0, 9, 0, 15, 0, 0], counters.values().tolist())
+        self.assertEqual(5, counters.get_saturation_count())
+        self.assertEqual(1, counters.raise_many(np.array([1, 2, 2]), np.array([7, 3, 6])))
+        self.assertEqual([0, 9, 6, 15, 0, 0], counters.values().tolist())
+
+    def test_sparse(self):
+        '''Test sparse counters behave like dense ones and switch to dense storage past the threshold'''
+        for counter_bits in [4, 8, 64]:
+            dense = CounterArray(1000, counter_bits=counter_bits)
+            sparse = CounterArray(1000, counter_bits=counter_bits, sparse=True, density_threshold=0.1)
+            for counters in [dense, sparse]:
+                for index in [3, 3, 7, 500]:
+                    counters.increment(index)
+                counters.decrement(7)
+                counters.add_many(np.array([1, 1, 999]), np.array([2, 30, 1]))
+            self.assertTrue(sparse.is_sparse())
+            self.assertEqual(dense.values().tolist(), sparse.values().tolist())
+            self.assertEqual(dense.get_saturation_count(), sparse.get_saturation_count())
+            self.assertLess(sparse.nbytes(), 1000)
+            indices = np.arange(0, 1000, 5)
+            for counters in [dense, sparse]:
+                counters.add_many(indices)
+                counters.subtract_many(indices[:50])
+            self.assertFalse(sparse.is_sparse())
+            self.assertEqual(dense.values().tolist(), sparse.values().tolist())
+            self.assertEqual(dense.nbytes(), sparse.nbytes())
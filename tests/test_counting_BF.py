@@ -42,4 +42,177 @@ class TestCountingBloomFilter(unittest.TestCase):
             orig = self.counting_BF.min_count(val)
             self.counting_BF.remove(val)
             new = self.counting_BF.min_count(val)
-            self.assertEqual(1, orig - new)
\ No newline at end of file
+            self.assertEqual(1, orig - new)
+
+    def test_double_hashing(self):
+        '''Test inserting and removing with double hashing'''
+        counting_BF = CountingBloomFilter(false_positive_rate=0.01, key_num=10000, hash_mode="double")
+        insert_values = [str(val) for val in range(10000)]
+        for val in insert_values:
+            counting_BF.insert(val)
+        for val in insert_values:
+            self.assertEqual(1, counting_BF.query(val))
+        false_positives = sum(counting_BF.query(str(val)) for val in range(10000, 30000))
+        self.assertLess(false_positives / 20000, 0.02)
+        for val in insert_values:
+            counting_BF.remove(val)
+        for val in insert_values:
+            self.assertEqual(0, counting_BF.query(val))
+
+    def test_union_intersection(self):
+        '''Test combining counting filters by adding and taking the minimum of counters'''
+        first = CountingBloomFilter(false_positive_rate=0.01, key_num=10000)
+        second = CountingBloomFilter(false_positive_rate=0.01, key_num=10000)
+        for val in range(0, 6000):
+            first.insert(str(val))
+        for val in range(4000, 10000):
+            second.insert(str(val))
+        union = first.union(second)
+        for val in range(10000):
+            self.assertEqual(1, union.query(str(val)))
+        self.assertGreaterEqual(union.min_count("5000"), 2)
+        intersection = first.intersection(second)
+        for val in range(4000, 6000):
+            self.assertEqual(1, intersection.query(str(val)))
+        first.merge_from(second)
+        self.assertTrue(np.array_equal(union.get_counter_array(), first.get_counter_array()))
+        for val in range(4000, 10000):
+            first.remove(str(val))
+        for val in range(0, 6000):
+            self.assertEqual(1, first.query(str(val)))
+        with self.assertRaises(Exception):
+            first.union(CountingBloomFilter(false_positive_rate=0.001, key_num=10000))
+
+    def test_telemetry(self):
+        '''Test incremental non-zero counter tracking and the cardinality estimate'''
+        counting_BF = CountingBloomFilter(false_positive_rate=0.01, key_num=10000)
+        for val in range(8000):
+            counting_BF.insert(str(val))
+        self.assertEqual(np.count_nonzero(counting_BF.get_counter_array()), counting_BF.popcount())
+        self.assertAlmostEqual(8000, counting_BF.estimated_cardinality(), delta=200)
+        for val in range(4000):
+            counting_BF.remove(str(val))
+        self.assertEqual(np.count_nonzero(counting_BF.get_counter_array()), counting_BF.popcount())
+        self.assertAlmostEqual(4000, counting_BF.estimated_cardinality(), delta=200)
+        self.assertLess(counting_BF.current_false_positive_rate(), 0.01)
+
+    def test_packed_counters(self):
+        '''Test 4 and 8 bit counters behave like 64 bit counters below saturation and use less memory'''
+        insert_values = [str(val) for val in range(5000)]
+        wide = CountingBloomFilter(false_positive_rate=0.01, key_num=10000)
+        for val in insert_values:
+            wide.insert(val)
+        for val in insert_values[:2500]:
+            wide.remove(val)
+        for counter_bits in [4, 8]:
+            packed = CountingBloomFilter(false_positive_rate=0.01, key_num=10000, counter_bits=counter_bits)
+            for val in insert_values:
+                packed.insert(val)
+            for val in insert_values[:2500]:
+                packed.remove(val)
+            for val in insert_values[2500:]:
+                self.assertEqual(1, packed.query(val))
+            self.assertEqual(0, packed.get_saturation_count())
+            self.assertTrue(np.array_equal(wide.get_counter_array(), packed.get_counter_array()))
+
+    def test_saturation(self):
+        '''Test 4 bit counters saturate instead of wrapping and never drop a saturated item'''
+        counting_BF = CountingBloomFilter(false_positive_rate=0.01, key_num=1000, counter_bits=4)
+        for _ in range(20):
+            counting_BF.insert("name")
+        self.assertEqual(15, counting_BF.min_count("name"))
+        self.assertEqual(5 * counting_BF.get_num_hashes(), counting_BF.get_saturation_count())
+        for _ in range(20):
+            counting_BF.remove("name")
+        self.assertEqual(1, counting_BF.query("name"))
+
+    def test_batch_operations(self):
+        '''Test batch operations match one-at-a-time operations for every counter width'''
+        np.random.seed(123)
+        insert_values = [str(val).encode() for val in np.random.choice(range(1, 1000000), size=20000)]
+        remove_values = insert_values[:8000]
+        for counter_bits in [4, 8, 64]:
+            sequential = CountingBloomFilter(false_positive_rate=0.01, key_num=20000, counter_bits=counter_bits)
+            batch = CountingBloomFilter(false_positive_rate=0.01, key_num=20000, counter_bits=counter_bits)
+            for val in insert_values:
+                sequential.insert(val)
+            for val in remove_values:
+                sequential.remove(val)
+            self.assertTrue(batch.insert_many(insert_values).all())
+            batch.remove_many(remove_values)
+            self.assertTrue(np.array_equal(sequential.get_counter_array(), batch.get_counter_array()))
+            self.assertEqual(sequential.popcount(), batch.popcount())
+            self.assertTrue(batch.query_many(insert_values[8000:]).all())
+            self.assertEqual([sequential.min_count(val) for val in insert_values[:500]], batch.min_count_many(insert_values[:500]).tolist())
+            test_values = [str(val) for val in range(1000)]
+            self.assertEqual([sequential.query(val) == 1 for val in test_values], batch.query_many(test_values).tolist())
+
+    def test_batch_saturation(self):
+        '''Test batch insertion saturates like single insertion'''
+        sequential = CountingBloomFilter(false_positive_rate=0.01, key_num=1000, counter_bits=4)
+        batch = CountingBloomFilter(false_positive_rate=0.01, key_num=1000, counter_bits=4)
+        for _ in range(20):
+            sequential.insert("name")
+        batch.insert_many(["name"] * 20)
+        self.assertEqual(sequential.get_saturation_count(), batch.get_saturation_count())
+        batch.remove_many(["name"] * 20)
+        self.assertEqual([15], batch.min_count_many(["name"]).tolist())
+
+    def test_delta_replication(self):
+        '''Test replicas catch up with full and incremental deltas'''
+        for counter_bits in [4, 64]:
+            primary = CountingBloomFilter(false_positive_rate=0.01, key_num=100000, counter_bits=counter_bits)
+            replica = CountingBloomFilter(false_positive_rate=0.01, key_num=100000, counter_bits=counter_bits)
+            primary.insert_many([str(i) for i in range(50000)])
+            delta = primary.export_delta()
+            replica.apply_delta(delta)
+            self.assertTrue(np.array_equal(primary.get_counter_array(), replica.get_counter_array()))
+            version = delta["version"]
+            primary.insert("new name")
+            primary.remove("0")
+            delta = primary.export_delta(version)
+            self.assertLessEqual(len(delta["chunks"]), 2 * primary.get_num_hashes())
+            self.assertLess(len(delta["values"]), primary.get_num_counters() / 10)
+            replica.apply_delta(delta)
+            self.assertTrue(np.array_equal(primary.get_counter_array(), replica.get_counter_array()))
+            self.assertEqual(primary.popcount(), replica.popcount())
+            self.assertEqual(0, len(primary.export_delta(primary.get_version())["chunks"]))
+            with self.assertRaises(Exception):
+                CountingBloomFilter(false_positive_rate=0.01, key_num=1000).apply_delta(delta)
+
+    def test_sparse(self):
+        '''Test a sparse counting bloom filter answers like a dense one before and after switching to dense counters'''
+        dense = CountingBloomFilter(false_positive_rate=0.01, key_num=100000, counter_bits=8)
+        sparse = CountingBloomFilter(false_positive_rate=0.01, key_num=100000, counter_bits=8, sparse=True)
+        values = [str(i) for i in range(20000)]
+        for bloom_filter in [dense, sparse]:
+            for val in values[:200]:
+                bloom_filter.insert(val)
+            bloom_filter.remove(values[0])
+        self.assertTrue(sparse.is_sparse())
+        self.assertLess(sparse.nbytes(), dense.nbytes() / 5)
+        self.assertEqual(dense.popcount(), sparse.popcount())
+        self.assertEqual(dense.query_many(values).tolist(), sparse.query_many(values).tolist())
+        for bloom_filter in [dense, sparse]:
+            bloom_filter.insert_many(values)
+            bloom_filter.remove_many(values[:5000])
+        self.assertFalse(sparse.is_sparse())
+        self.assertTrue(np.array_equal(dense.get_counter_array(), sparse.get_counter_array()))
+        self.assertEqual([dense.min_count(val) for val in values[:100]], [sparse.min_count(val) for val in values[:100]])
+
+    def test_freeze_thaw(self):
+        '''Test a frozen filter answers like the counting filter and thawing restores the counts'''
+        values = [str(i) for i in range(20000)]
+        bloom_filter = CountingBloomFilter(false_positive_rate=0.01, key_num=20000, hash_mode="double")
+        bloom_filter.insert_many(values)
+        bloom_filter.remove_many(values[:5000])
+        frozen = bloom_filter.freeze()
+        self.assertEqual(bloom_filter.get_num_counters(), frozen.get_num_bits())
+        self.assertEqual(bloom_filter.get_num_hashes(), frozen.get_num_hashes())
+        self.assertEqual(bloom_filter.popcount(), frozen.popcount())
+        test_values = values + [str(i) for i in range(20000, 40000)]
+        self.assertEqual(bloom_filter.query_many(test_values).tolist(), frozen.query_many(test_values).tolist())
+        self.assertEqual([bloom_filter.query(val) for val in test_values[:200]], [frozen.query(val) for val in test_values[:200]])
+        thawed = CountingBloomFilter.thaw(frozen, values[5000:])
+        self.assertTrue(np.array_equal(bloom_filter.get_counter_array(), thawed.get_counter_array()))
+        self.assertTrue(thawed.remove(values[5000]))
@@ -33,6 +33,138 @@ class TestCuckoo(unittest.TestCase):
             self.assertEqual(1, self.filter.query(val))
         logger.info("Test insert multi passed")
     
+    def test_array_storage(self):
+        '''Test the numpy table answers like bucket lists at low load'''
+        np.random.seed(123)
+        insert_values = [str(val).encode() for val in np.random.choice(range(1, 1000000), size=20000, replace=False)]
+        list_filter = CuckooFilter(num_buckets=100000)
+        array_filter = CuckooFilter(num_buckets=100000, storage="array")
+        for val in insert_values:
+            self.assertTrue(list_filter.insert(val))
+            self.assertTrue(array_filter.insert(val))
+        test_values = [str(val).encode() for val in range(1000000, 1010000)]
+        for val in insert_values + test_values:
+            self.assertEqual(list_filter.query(val), array_filter.query(val))
+        self.assertEqual(100000 * 4 * 2 + 100000, array_filter.nbytes())
+        for val in insert_values[:10000]:
+            self.assertEqual(list_filter.remove(val), array_filter.remove(val))
+        for val in insert_values:
+            self.assertEqual(list_filter.query(val), array_filter.query(val))
+        logger.info("Test array storage passed")
+
+    def test_alternate_index(self):
+        '''Test the integer alternate index maps each candidate bucket to the other'''
+        for num_buckets, fingerprint_size in [(1 << 12, 1), (1 << 12, 4), (20370, 2), (20370, 6)]:
+            cuckoo = CuckooFilter(num_buckets=num_buckets, fingerprint_size=fingerprint_size, hashing="integer")
+            for val in range(1000):
+                fp, index1, index2 = cuckoo._locate(str(val))
+                self.assertTrue(0 < fp < 1 << cuckoo.fingerprint_bits)
+                self.assertTrue(0 <= index2 < num_buckets)
+                self.assertEqual(index1, cuckoo._alternate_index(index2, fp))
+        logger.info("Test alternate index passed")
+
+    def test_fingerprint_width(self):
+        '''Test integer fingerprints use every byte of the configured size'''
+        for fingerprint_size in [2, 4, 6, 8]:
+            cuckoo = CuckooFilter(num_buckets=1000, fingerprint_size=fingerprint_size, hashing="integer")
+            fps, _, _ = cuckoo._locate_many([str(val) for val in range(1000)])
+            self.assertEqual([int(fp) for fp in fps], [cuckoo._locate(str(val))[0] for val in range(1000)])
+            self.assertGreater(int(fps.max()), 1 << (8 * fingerprint_size - 2))
+            self.assertLess(int(fps.max()), 1 << (8 * fingerprint_size))
+        with self.assertRaises(Exception):
+            CuckooFilter(fingerprint_size=9, hashing="integer")
+        logger.info("Test fingerprint width passed")
+
+    def test_bytes_hashing(self):
+        '''Test the bytes hashing path still inserts, queries and removes'''
+        for storage in ["list", "array"]:
+            cuckoo = CuckooFilter(num_buckets=1000, storage=storage, hashing="bytes")
+            self.assertTrue(cuckoo.insert("apple"))
+            self.assertEqual(1, cuckoo.query("apple"))
+            self.assertTrue(cuckoo.remove("apple"))
+            self.assertEqual(0, cuckoo.query("apple"))
+        logger.info("Test bytes hashing passed")
+
+    def test_batch_operations(self):
+        '''Test batch inserts and queries answer like single ones'''
+        insert_values = [f"name{val}" for val in range(20000)]
+        test_values = [f"other{val}" for val in range(5000)]
+        for storage in ["list", "array"]:
+            for fingerprint_size in [2, 4]:
+                batch_filter = CuckooFilter(num_buckets=1 << 12, bucket_size=6, fingerprint_size=fingerprint_size, storage=storage, hashing="integer")
+                self.assertTrue(batch_filter.insert_many(insert_values).all())
+                self.assertEqual(len(insert_values), batch_filter.count)
+                self.assertTrue(batch_filter.query_many(insert_values).all())
+                found = batch_filter.query_many(insert_values + test_values)
+                self.assertEqual([batch_filter.query(val) for val in insert_values + test_values], found.astype(int).tolist())
+        logger.info("Test batch operations passed")
+
+    def test_batch_insert_high_load(self):
+        '''Test batch inserts fall back to evictions once buckets fill up'''
+        cuckoo = CuckooFilter(num_buckets=1000, bucket_size=4, storage="array", hashing="integer")
+        insert_values = [str(val) for val in range(3800)]
+        inserted = cuckoo.insert_many(insert_values)
+        self.assertEqual(int(inserted.sum()), cuckoo.count)
+        self.assertEqual(cuckoo.count, int(cuckoo.occupancy.sum()))
+        self.assertGreater(cuckoo.count, 3700)
+        logger.info("Test batch insert high load passed")
+
+    def test_bfs_eviction(self):
+        '''Test breadth first evictions keep every item findable at high load'''
+        insert_values = [str(val) for val in range(5600)]
+        for storage in ["list", "array"]:
+            cuckoo = CuckooFilter(num_buckets=1000, bucket_size=6, storage=storage, hashing="integer", eviction="bfs")
+            inserted = [cuckoo.insert(val) for val in insert_values]
+            self.assertTrue(all(inserted))
+            self.assertTrue(cuckoo.query_many(insert_values).all())
+            self.assertGreater(cuckoo.moves, 0)
+            # a full filter refuses the item without losing a stored fingerprint
+            while cuckoo.insert(f"extra{cuckoo.count}"):
+                pass
+            self.assertTrue(cuckoo.query_many(insert_values).all())
+        # the bytes alternate index does not map back, so moved fingerprints could never be found again
+        with self.assertRaises(Exception):
+            CuckooFilter(hashing="bytes", eviction="bfs")
+        logger.info("Test bfs eviction passed")
+
+    def test_elastic(self):
+        '''Test an elastic filter chains tables instead of failing inserts'''
+        insert_values = [str(val) for val in range(20000)]
+        for storage in ["list", "array"]:
+            for eviction in ["random", "bfs"]:
+                cuckoo = CuckooFilter(num_buckets=1000, bucket_size=4, max_evictions=50, storage=storage, hashing="integer", eviction=eviction, elastic=True)
+                self.assertTrue(all(cuckoo.insert(val) for val in insert_values[:10000]))
+                self.assertTrue(cuckoo.insert_many(insert_values[10000:]).all())
+                self.assertEqual(len(insert_values), len(cuckoo))
+                self.assertGreater(cuckoo.num_tables(), 1)
+                self.assertTrue(cuckoo.query_many(insert_values).all())
+                self.assertTrue(all(cuckoo.query(val) for val in insert_values))
+                for val in insert_values[:100]:
+                    self.assertTrue(cuckoo.remove(val))
+                self.assertEqual(len(insert_values) - 100, len(cuckoo))
+        with self.assertRaises(Exception):
+            CuckooFilter(hashing="bytes", elastic=True)
+        logger.info("Test elastic passed")
+
+    def test_elastic_churn(self):
+        '''Test an elastic filter reuses space freed in earlier tables instead of chaining new ones'''
+        for storage in ["list", "array"]:
+            cuckoo = CuckooFilter(num_buckets=1000, bucket_size=4, fingerprint_size=4, max_evictions=50, storage=storage, hashing="integer", elastic=True)
+            live = [str(val) for val in range(8000)]
+            self.assertTrue(cuckoo.insert_many(live).all())
+            self.assertEqual(2, cuckoo.num_tables())
+            for start in range(8000, 24000, 500):
+                for val in live[:500]:
+                    self.assertTrue(cuckoo.remove(val))
+                batch = [str(val) for val in range(start, start + 500)]
+                self.assertTrue(all(cuckoo.insert(val) for val in batch[:250]))
+                self.assertTrue(cuckoo.insert_many(batch[250:]).all())
+                live = live[500:] + batch
+                self.assertEqual(len(live), len(cuckoo))
+            self.assertEqual(2, cuckoo.num_tables())
+            self.assertTrue(cuckoo.query_many(live).all())
+        logger.info("Test elastic churn passed")
+
     # def test_remove_one(self):
     #     '''Test removing a number'''
     #     target = 2
@@ -0,0 +1,62 @@
+import unittest
+import os
+import sys
+
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.append(src_path)
+from structures.counting_bloom_filter import CountingBloomFilter
+from structures.d_left_counting_filter import DLeftCountingFilter
+
+class TestDLeftCountingFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.bloom_filter = DLeftCountingFilter(false_positive_rate=0.01, key_num=20000)
+
+    def test_insert_query(self):
+        '''Test no false negatives and the false positive rate'''
+        for i in range(20000):
+            self.assertTrue(self.bloom_filter.insert(str(i)))
+        self.assertEqual(20000, len(self.bloom_filter))
+        for i in range(20000):
+            self.assertEqual(1, self.bloom_filter.query(str(i)))
+        false_positives = sum(self.bloom_filter.query(str(i)) for i in range(20000, 40000))
+        self.assertLess(false_positives / 20000, 0.02)
+
+    def test_remove(self):
+        '''Test removal frees items without disturbing others'''
+        for i in range(10000):
+            self.bloom_filter.insert(str(i))
+        for i in range(5000):
+            self.assertTrue(self.bloom_filter.remove(str(i)))
+        self.assertEqual(5000, len(self.bloom_filter))
+        for i in range(5000, 10000):
+            self.assertEqual(1, self.bloom_filter.query(str(i)))
+        self.assertLess(sum(self.bloom_filter.query(str(i)) for i in range(5000)), 100)
+        self.assertFalse(self.bloom_filter.remove("missing"))
+
+    def test_min_count(self):
+        '''Test counts of repeated insertions and removals'''
+        for _ in range(3):
+            self.bloom_filter.insert("name")
+        self.assertEqual(3, self.bloom_filter.min_count("name"))
+        self.bloom_filter.remove("name")
+        self.assertEqual(2, self.bloom_filter.min_count("name"))
+        self.assertEqual(0, self.bloom_filter.min_count("other"))
+        for _ in range(300):
+            self.bloom_filter.insert("popular")
+        self.assertEqual(15, self.bloom_filter.min_count("popular"))
+        self.assertEqual(285, self.bloom_filter.get_saturation_count())
+        self.bloom_filter.remove("popular")
+        self.assertEqual(15, self.bloom_filter.min_count("popular"))
+
+    def test_memory(self):
+        '''Test the packed cells take well under the memory of a 4 bit counting bloom filter'''
+        self.assertLess(self.bloom_filter.nbytes() / 20000, 4)
+        for false_positive_rate in [0.01, 0.0001]:
+            d_left = DLeftCountingFilter(false_positive_rate=false_positive_rate, key_num=100000)
+            counting = CountingBloomFilter(false_positive_rate=false_positive_rate, key_num=100000, counter_bits=4)
+            self.assertLess(d_left.nbytes(), 0.6 * counting.nbytes())
+        with self.assertRaises(Exception):
+            DLeftCountingFilter(num_tables=0)
+        with self.assertRaises(Exception):
+            DLeftCountingFilter(counter_bits=9)
@@ -0,0 +1,59 @@
+import numpy as np
+import unittest
+import os
+import sys
+
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.append(src_path)
+from structures.hyperloglog import HyperLogLog
+
+class TestHyperLogLog(unittest.TestCase):
+
+    def test_small_counts(self):
+        '''Test sparse sketches count small sets almost exactly'''
+        sketch = HyperLogLog()
+        for i in range(1000):
+            sketch.add(f"user{i % 500}")
+        self.assertTrue(sketch.is_sparse())
+        self.assertAlmostEqual(500, sketch.count(), delta=2)
+        self.assertEqual(0, round(HyperLogLog().count()))
+
+    def test_large_counts(self):
+        '''Test dense sketches stay within a few standard errors'''
+        for sparse in [True, False]:
+            sketch = HyperLogLog(precision=12, sparse=sparse)
+            sketch.add_many(np.arange(200000))
+            self.assertFalse(sketch.is_sparse())
+            self.assertEqual(4096, sketch.nbytes())
+            self.assertAlmostEqual(200000, sketch.count(), delta=200000 * 3 * 1.04 / 64)
+
+    def test_add_many(self):
+        '''Test batch and single additions build the same sketch'''
+        names = [f"user{i}" for i in range(5000)]
+        single = HyperLogLog()
+        batch = HyperLogLog()
+        for name in names:
+            single.add(name)
+        batch.add_many(names)
+        self.assertEqual(single.count(), batch.count())
+
+    def test_merge(self):
+        '''Test merging shard sketches counts the union'''
+        for size in [300, 30000]:
+            shards = [HyperLogLog() for _ in range(3)]
+            for i, shard in enumerate(shards):
+                shard.add_many([f"user{j}" for j in range(i * size // 2, i * size // 2 + size)])
+            whole = HyperLogLog()
+            whole.add_many([f"user{j}" for j in range(2 * size)])
+            merged = shards[0]
+            merged.merge(shards[1])
+            merged.merge(shards[2])
+            self.assertEqual(whole.count(), merged.count())
+        dense = HyperLogLog(sparse=False)
+        dense.add_many(["a", "b"])
+        sparse = HyperLogLog()
+        sparse.add("c")
+        sparse.merge(dense)
+        self.assertAlmostEqual(3, sparse.count(), delta=0.1)
+        with self.assertRaises(Exception):
+            sparse.merge(HyperLogLog(precision=10))
@@ -0,0 +1,53 @@
+import numpy as np
+import unittest
+import os
+import sys
+
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.append(src_path)
+from structures.learned_bloom_filter import LearnedBloomFilter
+
+def random_words(alphabet, size, seed):
+    '''Generates random words of 4 to 10 letters from an alphabet.'''
+    generator = np.random.default_rng(seed)
+    return ["".join(generator.choice(list(alphabet), size=generator.integers(4, 11))) for _ in range(size)]
+
+class TestLearnedBloomFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = random_words("abcdefghijklm", 5000, 1)
+        non_keys = random_words("nopqrstuvwxyz0123456789", 10000, 2)
+        self.train_non_keys, self.test_non_keys = non_keys[:5000], non_keys[5000:]
+        self.bloom_filter = LearnedBloomFilter(self.keys, self.train_non_keys, false_positive_rate=0.01)
+
+    def test_no_false_negatives(self):
+        '''Test every training key is found, singly and in batch'''
+        self.assertTrue(self.bloom_filter.query_many(self.keys).all())
+        for key in self.keys[:200]:
+            self.assertEqual(1, self.bloom_filter.query(key))
+            self.assertEqual(1, self.bloom_filter.query(key.encode()))
+
+    def test_false_positive_rate(self):
+        '''Test the false positive rate on unseen non-keys'''
+        found = self.bloom_filter.query_many(self.test_non_keys)
+        self.assertLess(found.mean(), 0.02)
+        self.assertEqual([self.bloom_filter.query(val) == 1 for val in self.test_non_keys[:200]], found[:200].tolist())
+
+    def test_insert(self):
+        '''Test inserting new keys after training'''
+        new_keys = random_words("nopqrstuvwxyz", 100, 3)
+        for key in new_keys:
+            self.bloom_filter.insert(key)
+        self.assertTrue(self.bloom_filter.query_many(new_keys).all())
+
+    def test_insert_keeps_rate(self):
+        '''Test many rejected inserts after training grow the backup filter instead of raising its false positive rate'''
+        new_keys = random_words("nopqrstuvwxyz", 20000, 4)
+        for key in new_keys:
+            self.bloom_filter.insert(key)
+        self.assertTrue(self.bloom_filter.query_many(new_keys).all())
+        self.assertGreater(self.bloom_filter.get_backup_filter().get_num_layers(), 1)
+        inserted = set(new_keys)
+        unseen = [key for key in random_words("nopqrstuvwxyz0123456789", 20000, 5) if key not in inserted]
+        self.assertLess(self.bloom_filter.get_backup_filter().query_many(unseen).mean(), 0.005)
+        self.assertLess(self.bloom_filter.query_many(unseen).mean(), 0.02)
@@ -0,0 +1,76 @@
+import numpy as np
+import unittest
+import os
+import sys
+
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.append(src_path)
+from structures.quotient_filter import QuotientFilter
+
+class TestQuotientFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.filter = QuotientFilter(quotient_bits=12, remainder_bits=12)
+
+    def test_insert_query(self):
+        '''Test no false negatives and the false positive rate while resizing'''
+        values = [str(val) for val in range(20000)]
+        for val in values:
+            self.assertTrue(self.filter.insert(val))
+        self.assertEqual(20000, len(self.filter))
+        self.assertEqual(15, self.filter.get_quotient_bits())
+        self.assertLessEqual(self.filter.load_factor(), 0.75)
+        for val in values:
+            self.assertEqual(1, self.filter.query(val))
+        false_positives = sum(self.filter.query(str(val)) for val in range(20000, 40000))
+        self.assertLess(false_positives / 20000, 0.01)
+
+    def test_remove(self):
+        '''Test removals against a multiset of stored items'''
+        np.random.seed(123)
+        stored = {}
+        for step in range(20000):
+            val = str(np.random.randint(0, 2000))
+            if np.random.rand() < 0.6:
+                self.filter.insert(val)
+                stored[val] = stored.get(val, 0) + 1
+            elif stored.get(val, 0) > 0:
+                self.assertTrue(self.filter.remove(val))
+                stored[val] -= 1
+        self.assertEqual(sum(stored.values()), len(self.filter))
+        for val, count in stored.items():
+            if count > 0:
+                self.assertEqual(1, self.filter.query(val))
+        for val in stored:
+            for _ in range(stored[val]):
+                self.assertTrue(self.filter.remove(val))
+        self.assertEqual(0, len(self.filter))
+        self.assertEqual(0, sum(self.filter.query(str(val)) for val in range(2000)))
+        self.assertFalse(self.filter.remove("missing"))
+
+    def test_merge(self):
+        '''Test merging two filters keeps the items of both'''
+        other = QuotientFilter(quotient_bits=10, remainder_bits=14)
+        for val in range(2000):
+            self.filter.insert(f"left{val}")
+            other.insert(f"right{val}")
+        merged = self.filter.merge(other)
+        self.assertEqual(4000, len(merged))
+        for val in range(2000):
+            self.assertEqual(1, merged.query(f"left{val}"))
+            self.assertEqual(1, merged.query(f"right{val}"))
+        self.assertTrue(merged.remove("left0"))
+        self.assertEqual(0, merged.query("left0"))
+        with self.assertRaises(Exception):
+            self.filter.merge(QuotientFilter(quotient_bits=12, remainder_bits=8))
+
+    def test_growth_limit(self):
+        '''Test inserts fail instead of raising once the remainders cannot give up another bit'''
+        small = QuotientFilter(quotient_bits=4, remainder_bits=3)
+        results = [small.insert(f"name{val}") for val in range(100)]
+        self.assertEqual(6, small.get_quotient_bits())
+        self.assertFalse(results[-1])
+        self.assertEqual(sum(results), len(small))
+        for val in range(100):
+            if results[val]:
+                self.assertEqual(1, small.query(f"name{val}"))
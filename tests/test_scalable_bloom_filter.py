@@ -0,0 +1,49 @@
+import numpy as np
+import unittest
+import os
+import sys
+
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.append(src_path)
+from structures.scalable_bloom_filter import ScalableBloomFilter
+
+class TestScalableBloomFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.bloom_filter = ScalableBloomFilter(false_positive_rate=0.01, key_num=1000)
+
+    def test_insert_one(self):
+        '''Test inserting a number'''
+        self.assertTrue(self.bloom_filter.insert(1))
+        self.assertFalse(self.bloom_filter.insert(1))
+        self.assertEqual(1, self.bloom_filter.query(1))
+
+    def test_grow(self):
+        '''Test inserting far past key_num adds layers and keeps the false positive rate bounded'''
+        insert_values = [str(val) for val in range(20000)]
+        for val in insert_values:
+            self.bloom_filter.insert(val)
+        self.assertGreater(self.bloom_filter.get_num_layers(), 3)
+        for val in insert_values:
+            self.assertEqual(1, self.bloom_filter.query(val))
+        false_positives = sum(self.bloom_filter.query(str(val)) for val in range(20000, 40000))
+        self.assertLess(false_positives / 20000, 0.01)
+
+    def test_insert_many(self):
+        '''Test batch insertion grows layers and agrees with batch queries'''
+        insert_values = np.arange(20000)
+        results = self.bloom_filter.insert_many(np.concatenate([insert_values, insert_values[:100]]))
+        self.assertFalse(results[20000:].any())
+        self.assertGreater(self.bloom_filter.get_num_layers(), 3)
+        self.assertTrue(self.bloom_filter.query_many(insert_values).all())
+        test_values = np.arange(20000, 40000)
+        found = self.bloom_filter.query_many(test_values)
+        self.assertEqual([self.bloom_filter.query(int(val)) == 1 for val in test_values[:500]], found[:500].tolist())
+        self.assertLess(found.mean(), 0.01)
+
+    def test_insert_many_mixed_types(self):
+        '''Test batch items are told apart by their hashes, not by numpy equality'''
+        results = self.bloom_filter.insert_many([1, "1"])
+        self.assertTrue(results.all())
+        self.assertEqual(1, self.bloom_filter.query(1))
+        self.assertEqual(1, self.bloom_filter.query("1"))
@@ -2,6 +2,7 @@ import numpy as np
 import unittest
 import os
 import sys
+import tempfile
 
 src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
 sys.path.append(src_path)
@@ -25,3 +26,131 @@ class TestBloomFilterSimple(unittest.TestCase):
             self.bloom_filter.insert(val)
         for val in insert_values:
             self.assertEqual(1, self.bloom_filter.query(val))
+
+    def test_insert_many(self):
+        '''Test batch insertion against one-at-a-time insertion'''
+        np.random.seed(123)
+        insert_values = [str(val).encode() for val in np.random.choice(range(1, 1000000), size=10000)]
+        sequential = BloomFilterSimple(false_positive_rate=0.1, key_num=1000)
+        expected = [sequential.insert(val) for val in insert_values]
+        self.assertEqual(len(insert_values), len(self.bloom_filter.insert_many(insert_values)))
+        small = BloomFilterSimple(false_positive_rate=0.1, key_num=1000)
+        self.assertEqual(expected, small.insert_many(insert_values).tolist())
+
+    def test_query_many(self):
+        '''Test batch queries agree with single queries'''
+        np.random.seed(123)
+        insert_values = np.random.choice(range(1, 1000000), size=10000)
+        self.bloom_filter.insert_many(insert_values)
+        self.assertTrue(self.bloom_filter.query_many(insert_values).all())
+        for val in insert_values[:100]:
+            self.assertEqual(1, self.bloom_filter.query(int(val)))
+        test_values = [str(val) for val in range(1000000, 1001000)]
+        self.assertEqual([self.bloom_filter.query(val) == 1 for val in test_values], self.bloom_filter.query_many(test_values).tolist())
+
+    def test_batch_integer_range(self):
+        '''Test batches reject integers past 32 bits like single inserts instead of wrapping them'''
+        with self.assertRaises(OverflowError):
+            self.bloom_filter.insert(2**32 + 1)
+        with self.assertRaises(OverflowError):
+            self.bloom_filter.insert_many(np.array([1, 2**32 + 1], dtype=np.int64))
+        self.assertTrue(self.bloom_filter.insert_many(np.array([-2**31, 2**31 - 1], dtype=np.int64)).all())
+
+    def test_double_hashing(self):
+        '''Test double hashing mode keeps single and batch results consistent and the false positive rate in check'''
+        bloom_filter = BloomFilterSimple(false_positive_rate=0.01, key_num=10000, hash_mode="double")
+        insert_values = [str(val) for val in range(10000)]
+        for val in insert_values[:5000]:
+            bloom_filter.insert(val)
+        bloom_filter.insert_many(insert_values[5000:])
+        for val in insert_values:
+            self.assertEqual(1, bloom_filter.query(val))
+        test_values = [str(val) for val in range(10000, 30000)]
+        results = bloom_filter.query_many(test_values)
+        self.assertEqual([bloom_filter.query(val) == 1 for val in test_values], results.tolist())
+        self.assertLess(results.mean(), 0.02)
+
+    def test_invalid_hash_mode(self):
+        '''Test an unknown hash mode is rejected'''
+        with self.assertRaises(Exception):
+            BloomFilterSimple(key_num=1000, hash_mode="unknown")
+
+    def test_save_open(self):
+        '''Test a saved filter opens memory mapped with the same contents'''
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "names.bloom")
+            bloom_filter = BloomFilterSimple(false_positive_rate=0.01, key_num=10000, hash_mode="double")
+            insert_values = [str(val) for val in range(10000)]
+            bloom_filter.insert_many(insert_values)
+            bloom_filter.save(path)
+
+            opened = BloomFilterSimple.open(path)
+            self.assertTrue(opened.query_many(insert_values).all())
+            test_values = [str(val) for val in range(10000, 20000)]
+            self.assertEqual(bloom_filter.query_many(test_values).tolist(), opened.query_many(test_values).tolist())
+            with self.assertRaises(Exception):
+                opened.insert("new")
+            opened.close()
+
+            writable = BloomFilterSimple.open(path, mode="r+")
+            self.assertTrue(writable.insert("new"))
+            writable.close()
+            reopened = BloomFilterSimple.open(path, mode="c")
+            self.assertEqual(1, reopened.query("new"))
+            reopened.insert("private")
+            reopened.close()
+            reopened = BloomFilterSimple.open(path)
+            self.assertEqual(0, reopened.query("private"))
+            reopened.close()
+
+    def test_close_in_use(self):
+        '''Test closing a filter whose bit array is still held fails without tearing the filter down'''
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "names.bloom")
+            bloom_filter = BloomFilterSimple(false_positive_rate=0.01, key_num=1000)
+            bloom_filter.insert("kept")
+            bloom_filter.save(path)
+            opened = BloomFilterSimple.open(path)
+            bit_array = opened.get_bit_array()
+            with self.assertRaises(Exception):
+                opened.close()
+            self.assertEqual(1, opened.query("kept"))
+            del bit_array
+            opened.close()
+
+    def test_union_intersection(self):
+        '''Test combining filters with the same parameters'''
+        first = BloomFilterSimple(false_positive_rate=0.01, key_num=10000)
+        second = BloomFilterSimple(false_positive_rate=0.01, key_num=10000)
+        first.insert_many([str(val) for val in range(0, 6000)])
+        second.insert_many([str(val) for val in range(4000, 10000)])
+        union = first.union(second)
+        self.assertTrue(union.query_many([str(val) for val in range(10000)]).all())
+        intersection = first.intersection(second)
+        self.assertTrue(intersection.query_many([str(val) for val in range(4000, 6000)]).all())
+        self.assertLess(intersection.fill_ratio(), union.fill_ratio())
+        first.merge_from(second)
+        self.assertEqual(union.get_bit_array(), first.get_bit_array())
+        with self.assertRaises(Exception):
+            first.union(BloomFilterSimple(false_positive_rate=0.001, key_num=10000))
+
+    def test_build_parallel(self):
+        '''Test a parallel build matches a sequential build'''
+        insert_values = [str(val) for val in range(20000)]
+        sequential = BloomFilterSimple(false_positive_rate=0.01, key_num=20000, hash_mode="double")
+        sequential.insert_many(insert_values)
+        parallel = BloomFilterSimple.build_parallel(insert_values, false_positive_rate=0.01, key_num=20000, hash_mode="double", num_workers=2)
+        self.assertEqual(sequential.get_bit_array(), parallel.get_bit_array())
+        self.assertEqual(sequential.fill_ratio(), parallel.fill_ratio())
+
+    def test_telemetry(self):
+        '''Test incremental popcount and the cardinality and false positive estimates'''
+        bloom_filter = BloomFilterSimple(false_positive_rate=0.01, key_num=10000)
+        for val in range(3000):
+            bloom_filter.insert(str(val))
+        bloom_filter.insert_many([str(val) for val in range(3000, 8000)])
+        self.assertEqual(bloom_filter.get_bit_array().count(), bloom_filter.popcount())
+        self.assertAlmostEqual(8000, bloom_filter.estimated_cardinality(), delta=200)
+        self.assertLess(bloom_filter.current_false_positive_rate(), 0.01)
+        bloom_filter.insert_many([str(val) for val in range(8000, 20000)])
+        self.assertGreater(bloom_filter.current_false_positive_rate(), 0.01)
@@ -0,0 +1,40 @@
+import numpy as np
+import unittest
+import os
+import sys
+
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.append(src_path)
+from structures.space_saving import SpaceSaving
+
+class TestSpaceSaving(unittest.TestCase):
+
+    def test_heavy_hitters(self):
+        '''Test every item above total / capacity is tracked with a bounded count'''
+        generator = np.random.default_rng(7)
+        stream = generator.zipf(1.3, size=50000).tolist()
+        values, frequencies = np.unique(stream, return_counts=True)
+        tracker = SpaceSaving(capacity=200)
+        for val in stream[:10000]:
+            tracker.add(val)
+        tracker.add_many(stream[10000:])
+        self.assertEqual(200, len(tracker))
+        self.assertEqual(len(stream), tracker.get_total())
+        for val, frequency in zip(values.tolist(), frequencies.tolist()):
+            if frequency > len(stream) / 200:
+                self.assertGreaterEqual(tracker.estimate(val), frequency)
+                self.assertLessEqual(tracker.estimate(val) - tracker.get_error(val), frequency)
+        top = tracker.top(5)
+        self.assertEqual([1, 2, 3, 4, 5], [item for item, _, _ in top])
+
+    def test_weighted_add(self):
+        '''Test weighted additions and eviction'''
+        tracker = SpaceSaving(capacity=2)
+        tracker.add_many(["Mary", "John", "Mary"], [5, 3, 2])
+        self.assertEqual([("Mary", 7, 0), ("John", 3, 0)], tracker.top())
+        self.assertEqual(4, tracker.add("Anna"))
+        self.assertEqual(3, tracker.get_error("Anna"))
+        self.assertEqual(0, tracker.estimate("John"))
+        self.assertEqual([("Mary", 7, 0)], tracker.top(1))
+        with self.assertRaises(Exception):
+            SpaceSaving(capacity=0)
@@ -0,0 +1,56 @@
+import numpy as np
+import unittest
+import os
+import sys
+
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.append(src_path)
+from structures.trie_bloom_filter import TrieBloomFilter
+
+class TestTrieBloomFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.bloom_filter = TrieBloomFilter(false_positive_rate=0.01, key_num=10000)
+
+    def test_insert_one(self):
+        '''Test inserting a name and querying its prefixes'''
+        self.assertTrue(self.bloom_filter.insert("Olivia"))
+        self.assertFalse(self.bloom_filter.insert("Olivia"))
+        self.assertEqual(1, self.bloom_filter.query("Olivia"))
+        self.assertEqual(0, self.bloom_filter.query("Oliv"))
+        for length in range(len("Olivia") + 1):
+            self.assertEqual(1, self.bloom_filter.query_prefix("Olivia"[:length]))
+        self.assertEqual(0, self.bloom_filter.query_prefix("Olivias"))
+        self.assertEqual(0, self.bloom_filter.query_prefix("Emma"))
+
+    def test_empty(self):
+        '''Test an empty filter has no prefixes'''
+        self.assertEqual(0, self.bloom_filter.query_prefix(""))
+
+    def test_insert_multi(self):
+        '''Test multiple insertions and the prefix false positive rate'''
+        np.random.seed(123)
+        insert_values = [str(val) for val in np.random.choice(range(100000, 1000000), size=10000, replace=False)]
+        self.bloom_filter.insert_many(insert_values[:5000])
+        for val in insert_values[5000:]:
+            self.bloom_filter.insert(val)
+        for val in insert_values:
+            self.assertEqual(1, self.bloom_filter.query(val))
+            self.assertEqual(1, self.bloom_filter.query_prefix(val[:3]))
+        false_positives = sum(self.bloom_filter.query_prefix("x" + str(val)) for val in range(10000))
+        self.assertLess(false_positives / 10000, 0.01)
+
+    def test_max_prefix_length(self):
+        '''Test prefixes longer than the maximum depth are cut to it'''
+        bloom_filter = TrieBloomFilter(false_positive_rate=0.01, key_num=1000, max_prefix_length=3)
+        bloom_filter.insert(b"article-title")
+        self.assertEqual(1, bloom_filter.query_prefix(b"art"))
+        self.assertEqual(1, bloom_filter.query_prefix(b"artistic"))
+        self.assertEqual(1, bloom_filter.query(b"article-title"))
+
+    def test_insert_many(self):
+        '''Test batch insertion agrees with one-at-a-time insertion'''
+        insert_values = ["Ava", "Avery", "Ava", "Aaron", "Avery", "Zoe"]
+        sequential = TrieBloomFilter(false_positive_rate=0.01, key_num=100)
+        expected = [sequential.insert(val) for val in insert_values]
+        self.assertEqual(expected, self.bloom_filter.insert_many(insert_values).tolist())
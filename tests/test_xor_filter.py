@@ -0,0 +1,40 @@
+import numpy as np
+import unittest
+import os
+import sys
+
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.append(src_path)
+from structures.xor_filter import XorFilter
+
+class TestXorFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.keys = [f"article{i}" for i in range(50000)]
+        self.missing = [f"article{i}" for i in range(50000, 100000)]
+
+    def test_no_false_negatives(self):
+        '''Test every key is found, singly and in batch'''
+        for fingerprint_bits in [8, 16]:
+            xor_filter = XorFilter(self.keys + self.keys[:100], fingerprint_bits=fingerprint_bits)
+            self.assertEqual(50000, len(xor_filter))
+            self.assertTrue(xor_filter.query_many(self.keys).all())
+            for key in self.keys[:500]:
+                self.assertEqual(1, xor_filter.query(key))
+
+    def test_false_positive_rate(self):
+        '''Test the false positive rate matches the fingerprint size'''
+        for fingerprint_bits, expected in [(8, 1 / 256), (16, 1 / 65536)]:
+            xor_filter = XorFilter(self.keys, fingerprint_bits=fingerprint_bits)
+            found = xor_filter.query_many(self.missing)
+            self.assertLess(found.mean(), 2 * expected + 0.0005)
+            self.assertEqual([xor_filter.query(key) == 1 for key in self.missing[:500]], found[:500].tolist())
+
+    def test_size(self):
+        '''Test the filter takes about 1.23 fingerprints per key'''
+        xor_filter = XorFilter(np.arange(100000), fingerprint_bits=16)
+        self.assertLess(xor_filter.get_num_slots(), 1.24 * 100000)
+        self.assertEqual(2 * xor_filter.get_num_slots(), xor_filter.nbytes())
+        self.assertTrue(xor_filter.query_many(np.arange(100000)).all())
+        with self.assertRaises(Exception):
+            XorFilter(self.keys, fingerprint_bits=4)